@@ -0,0 +1,131 @@
+"""APK 信息命令行工具（不依赖 Qt），适合在 CI 中对构建产物逐个输出 JSON
+
+用法:
+    python apk_cli.py app.apk                      每个 APK 输出一行 JSON (NDJSON)
+    python apk_cli.py "build/**/*.apk" -f json     通配符（含 **）和文件夹都会展开，输出 JSON 数组
+    find out -name "*.apk" | python apk_cli.py -   从标准输入逐行读取路径
+    python apk_cli.py app.apk -s signature,abis    只输出指定分段，不需要清单时不会加载 pyaxmlparser
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument
+from apk_session import SECTIONS, APKSession
+from apk_paths import iter_apks_in_dir
+
+NO_MATCH = "通配符没有匹配到任何文件"
+NO_APK_IN_DIR = "文件夹中没有 APK 文件"
+
+
+def iter_input_paths(inputs, stdin=None):
+    """展开命令行输入：文件、文件夹（递归查找 .apk）、通配符，"-" 表示从标准输入读取路径列表
+
+    产出 (路径, None)；通配符或文件夹什么都没匹配到时产出 (原输入, 错误信息)，
+    以免 CI 中写错产物路径时静默通过。
+    """
+    for item in inputs:
+        if item == "-":
+            for line in stdin or sys.stdin:
+                line = line.rstrip("\r\n")
+                if line:
+                    yield line, None
+            continue
+        if glob.has_magic(item):
+            paths, error = sorted(glob.glob(item, recursive=True)), NO_MATCH
+        elif os.path.isdir(item):
+            paths, error = iter_apks_in_dir(item), NO_APK_IN_DIR
+        else:
+            yield item, None  # 不存在的文件由 analyze 报告错误
+            continue
+        matched = False
+        for path in paths:
+            matched = True
+            yield path, None
+        if not matched:
+            yield item, error
+
+
+def analyze(path, sections=SECTIONS, cache=None):
+    """分析一个 APK，返回输出记录 {"path", 各分段...}；出错时返回 {"path", "error"}"""
+    record = {"path": path}
+    full = tuple(sections) == SECTIONS
+    cached = cache.get(path) if cache is not None and full else None
+    if cached is not None:
+        record.update(cached)
+        return record
+    try:
+        with instrument.span("apk.analyze", file=os.path.basename(path)), APKSession(path) as apk:
+            result = dict(apk.iter_sections(sections))
+    except Exception as e:
+        record["error"] = str(e) or type(e).__name__
+        return record
+    if cache is not None and full:
+        cache.put(path, result)
+    record.update(result)
+    return record
+
+
+def parse_sections(value):
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"未知的分段 {', '.join(unknown)}（可选: {', '.join(SECTIONS)}）")
+    return tuple(names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="输出 APK 的包名、版本、SDK、架构、签名和权限信息（JSON）")
+    parser.add_argument("inputs", nargs="+", metavar="APK",
+                        help="APK 文件、文件夹或通配符；'-' 表示从标准输入读取路径列表")
+    parser.add_argument("-f", "--format", choices=["ndjson", "json"], default="ndjson",
+                        help="ndjson: 每个 APK 一行（默认，边分析边输出）；json: 一个 JSON 数组")
+    parser.add_argument("-s", "--sections", type=parse_sections, default=SECTIONS,
+                        help=f"只输出这些分段，逗号分隔（默认全部: {','.join(SECTIONS)}）")
+    parser.add_argument("--cache", action="store_true",
+                        help="使用与图形界面共用的磁盘缓存（仅在输出全部分段时生效）")
+    parser.add_argument("--verify-cache", action="store_true",
+                        help="使用缓存前再校验签名块和中央目录的摘要，能发现修改时间未变的内容变化（隐含 --cache）")
+    instrument.add_arguments(parser)
+    args = parser.parse_args(argv)
+    instrument.configure_from_args(args)
+
+    analysis_cache = None
+    if args.cache or args.verify_cache:
+        import cache
+        analysis_cache = cache.open_cache(verify_digest=args.verify_cache)
+
+    failed = 0
+    records = []
+    try:
+        for path, error in iter_input_paths(args.inputs):
+            if error:
+                record = {"path": path, "error": error}
+            else:
+                record = analyze(path, args.sections, analysis_cache)
+            failed += "error" in record
+            if args.format == "ndjson":
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+            else:
+                records.append(record)
+        if args.format == "json":
+            json.dump(records, sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭了管道
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if analysis_cache is not None:
+            analysis_cache.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""两个 APK 的差异对比
+
+条目差异只比较两份中央目录：按名称合并，用中央目录记录的 CRC32 和大小判断新增/删除/修改，
+不解压任何条目，因此对几 GB 的 APK 也只需读取文件末尾的中央目录。
+清单字段、权限和签名证书指纹另外通过 APKSession 读取（只解压 AndroidManifest.xml）。
+
+用法: python apk_diff.py 旧.apk 新.apk [--json]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument
+from common.formatting import format_size
+import native_libs
+from apk_session import APKSession
+
+FIELDS = [
+    ("label", "应用名称"),
+    ("package", "包名"),
+    ("version", "版本名称"),
+    ("version_code", "版本号"),
+    ("min_sdk", "最低SDK"),
+    ("target_sdk", "目标SDK"),
+]
+ROOT_GROUP = "(根目录)"
+
+
+def diff_entries(old_index, new_index):
+    """按名称合并两份中央目录，依次产出 (状态, 名称, 旧条目, 新条目)
+
+    状态为 "added"、"removed" 或 "changed"；CRC 和解压大小都相同的条目视为未变化，不产出。
+    """
+    old_names = sorted(old_index.entries)
+    new_names = sorted(new_index.entries)
+    i = j = 0
+    while i < len(old_names) or j < len(new_names):
+        if j >= len(new_names) or (i < len(old_names) and old_names[i] < new_names[j]):
+            name = old_names[i]
+            yield "removed", name, old_index.entries[name], None
+            i += 1
+        elif i >= len(old_names) or new_names[j] < old_names[i]:
+            name = new_names[j]
+            yield "added", name, None, new_index.entries[name]
+            j += 1
+        else:
+            name = old_names[i]
+            old, new = old_index.entries[name], new_index.entries[name]
+            if old.crc != new.crc or old.file_size != new.file_size:
+                yield "changed", name, old, new
+            i += 1
+            j += 1
+
+
+def group_of(name):
+    """条目所属的统计分组：原生库按 lib/<abi>，其余按顶层目录"""
+    parsed = native_libs.split_lib_path(name)
+    if parsed:
+        return f"lib/{parsed[0]}"
+    head, sep, _ = name.partition("/")
+    return head + "/" if sep else ROOT_GROUP
+
+
+def _sizes(entry):
+    return (entry.compress_size, entry.file_size) if entry is not None else (0, 0)
+
+
+def size_deltas(old_index, new_index):
+    """按分组统计两个 APK 的压缩/解压大小，返回 {分组: {"old", "new", "old_uncompressed", "new_uncompressed"}}"""
+    groups = {}
+
+    def add(index, side):
+        for entry in index:
+            group = groups.setdefault(group_of(entry.name), {
+                "old": 0, "new": 0, "old_uncompressed": 0, "new_uncompressed": 0,
+            })
+            compressed, uncompressed = _sizes(entry)
+            group[side] += compressed
+            group[side + "_uncompressed"] += uncompressed
+
+    add(old_index, "old")
+    add(new_index, "new")
+    return dict(sorted(groups.items()))
+
+
+def _summary(apk):
+    """读取对比需要的清单字段、权限和签名者"""
+    info = {
+        "label": apk.get_app_label(),
+        "package": apk.get_package(),
+        "version": apk.get_version_name(),
+        "version_code": apk.get_version_code(),
+        "min_sdk": apk.get_min_sdk_version(),
+        "target_sdk": apk.get_target_sdk_version(),
+        "permissions": apk.get_permissions(),
+    }
+    try:
+        info["signature"] = apk.get_signature_info()
+    except Exception as e:
+        info["signature"] = {"schemes": [], "certificates": [], "error": str(e)}
+    return info
+
+
+def _set_diff(old, new):
+    old, new = set(old), set(new)
+    return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def diff_apks(old_path, new_path):
+    """对比两个 APK，返回差异报告（可直接序列化为 JSON 的 dict）"""
+    with APKSession(old_path) as old_apk, APKSession(new_path) as new_apk:
+        entries = {"added": [], "removed": [], "changed": []}
+        with instrument.span("diff.entries"):
+            for status, name, old, new in diff_entries(old_apk.index, new_apk.index):
+                old_compressed, old_size = _sizes(old)
+                new_compressed, new_size = _sizes(new)
+                entries[status].append({
+                    "name": name,
+                    "old_size": old_size,
+                    "new_size": new_size,
+                    "old_compressed": old_compressed,
+                    "new_compressed": new_compressed,
+                })
+            groups = size_deltas(old_apk.index, new_apk.index)
+        old_info = _summary(old_apk) if old_apk.is_valid() else None
+        new_info = _summary(new_apk) if new_apk.is_valid() else None
+
+    report = {
+        "old": old_path,
+        "new": new_path,
+        "fields": [],
+        "permissions": {"added": [], "removed": []},
+        "signers": {"added": [], "removed": [], "schemes_old": [], "schemes_new": []},
+        "entries": entries,
+        "groups": groups,
+        "totals": {
+            "old": sum(g["old"] for g in groups.values()),
+            "new": sum(g["new"] for g in groups.values()),
+            "old_uncompressed": sum(g["old_uncompressed"] for g in groups.values()),
+            "new_uncompressed": sum(g["new_uncompressed"] for g in groups.values()),
+        },
+    }
+    if old_info is None or new_info is None:
+        report["error"] = "AndroidManifest.xml 无效，只对比了文件条目"
+        return report
+
+    for key, _ in FIELDS:
+        if old_info[key] != new_info[key]:
+            report["fields"].append({"field": key, "old": old_info[key], "new": new_info[key]})
+    report["permissions"] = _set_diff(old_info["permissions"], new_info["permissions"])
+    old_sig, new_sig = old_info["signature"], new_info["signature"]
+    report["signers"] = _set_diff((c["sha256"] for c in old_sig["certificates"]),
+                                  (c["sha256"] for c in new_sig["certificates"]))
+    report["signers"]["schemes_old"] = old_sig["schemes"]
+    report["signers"]["schemes_new"] = new_sig["schemes"]
+    return report
+
+
+def _format_delta(old, new):
+    delta = new - old
+    sign = "+" if delta > 0 else "-" if delta < 0 else "±"
+    return f"{format_size(old)} → {format_size(new)} ({sign}{format_size(abs(delta))})"
+
+
+def iter_report_lines(report, max_entries=200):
+    """把差异报告格式化为文本行；每类条目最多列出 max_entries 个"""
+    labels = dict(FIELDS)
+    yield f"旧: {report['old']}"
+    yield f"新: {report['new']}"
+    if report.get("error"):
+        yield f"注意: {report['error']}"
+    yield ""
+
+    yield "【清单字段】"
+    if report["fields"]:
+        for change in report["fields"]:
+            yield f"  {labels[change['field']]}: {change['old']} → {change['new']}"
+    else:
+        yield "  无变化"
+
+    yield "【权限】"
+    permissions = report["permissions"]
+    for name in permissions["added"]:
+        yield f"  [+] {name}"
+    for name in permissions["removed"]:
+        yield f"  [-] {name}"
+    if not permissions["added"] and not permissions["removed"]:
+        yield "  无变化"
+
+    yield "【签名】"
+    signers = report["signers"]
+    if signers["schemes_old"] != signers["schemes_new"]:
+        yield f"  签名方案: {', '.join(signers['schemes_old']) or '无'} → {', '.join(signers['schemes_new']) or '无'}"
+    for sha256 in signers["added"]:
+        yield f"  [+] SHA-256: {sha256}"
+    for sha256 in signers["removed"]:
+        yield f"  [-] SHA-256: {sha256}"
+    if not signers["added"] and not signers["removed"]:
+        yield "  签名证书未变化"
+
+    yield "【大小（压缩后 / 解压后）】"
+    for group, sizes in report["groups"].items():
+        if sizes["old"] == sizes["new"] and sizes["old_uncompressed"] == sizes["new_uncompressed"]:
+            continue
+        yield f"  {group}: {_format_delta(sizes['old'], sizes['new'])}" \
+              f" / {_format_delta(sizes['old_uncompressed'], sizes['new_uncompressed'])}"
+    totals = report["totals"]
+    yield f"  合计: {_format_delta(totals['old'], totals['new'])}" \
+          f" / {_format_delta(totals['old_uncompressed'], totals['new_uncompressed'])}"
+
+    entries = report["entries"]
+    yield (f"【文件条目】新增 {len(entries['added'])}，删除 {len(entries['removed'])}，"
+           f"修改 {len(entries['changed'])}")
+    for status, marker in (("added", "[+]"), ("removed", "[-]"), ("changed", "[*]")):
+        items = entries[status]
+        for item in items[:max_entries]:
+            if status == "added":
+                size = format_size(item["new_size"])
+            elif status == "removed":
+                size = format_size(item["old_size"])
+            else:
+                size = _format_delta(item["old_size"], item["new_size"])
+            yield f"  {marker} {item['name']}  {size}"
+        if len(items) > max_entries:
+            yield f"  ... 另有 {len(items) - max_entries} 个"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两个 APK 的差异（不解压文件条目）")
+    parser.add_argument("old", help="旧版本 APK")
+    parser.add_argument("new", help="新版本 APK")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出完整报告")
+    instrument.add_arguments(parser)
+    args = parser.parse_args(argv)
+    instrument.configure_from_args(args)
+
+    try:
+        report = diff_apks(args.old, args.new)
+    except Exception as e:
+        print(f"对比失败: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for line in iter_report_lines(report, max_entries=sys.maxsize):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""把命令行/拖放的输入展开为 APK 路径（不依赖 Qt 和进程池，命令行工具导入它不会带上 multiprocessing）"""
+import os
+
+
+def iter_apks_in_dir(path):
+    """递归查找文件夹中的 .apk 文件，按路径顺序产出"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".apk"):
+                yield os.path.join(root, name)
+
+
+def collect_apk_paths(inputs):
+    """把文件和文件夹列表展开为 APK 路径（文件夹递归查找 .apk）"""
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from iter_apks_in_dir(path)
+        elif path.lower().endswith(".apk") and os.path.isfile(path):
+            yield path
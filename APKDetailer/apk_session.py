@@ -0,0 +1,214 @@
+"""APK 解析会话：只打开一次文件、只解析一次中央目录，所有查询共用同一份索引"""
+import os
+import re
+from zipfile import BadZipFile
+
+from common import instrument
+import arsc
+import native_libs
+import signing
+from zipindex import ZipIndex
+
+ANDROID_NS = "{http://schemas.android.com/apk/res/android}"
+MANIFEST_NAME = "AndroidManifest.xml"
+RESOURCES_NAME = "resources.arsc"
+
+RESOURCE_REF_RE = re.compile(r"^@([0-9A-Fa-f]{8})$")
+
+# 分析结果的结构版本，结构变化时加一，使磁盘缓存失效
+ANALYSIS_VERSION = 4
+
+# 分段解析的顺序：越靠前的越便宜、越常用
+SECTIONS = ("basic", "sdk", "abis", "signature", "permissions", "native_libs")
+# 需要解析 AndroidManifest.xml 的分段
+MANIFEST_SECTIONS = {"basic", "sdk", "permissions"}
+
+
+class APKSession:
+    """一次 APK 分析会话，建议配合 with 语句使用"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fp = open(path, "rb")
+        try:
+            self.index = ZipIndex(self._fp, os.fstat(self._fp.fileno()).st_size)
+        except Exception:
+            self._fp.close()
+            raise
+        self._manifest = None
+        self._resources = None
+
+    def close(self):
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def manifest(self):
+        """解码后的 AndroidManifest.xml（lxml 元素），首次访问时解析"""
+        if self._manifest is None and MANIFEST_NAME in self.index:
+            # pyaxmlparser 导入较慢（约 0.1 秒），只有真正需要清单时才加载
+            from pyaxmlparser.axmlprinter import AXMLPrinter
+            printer = AXMLPrinter(self.index.read(MANIFEST_NAME))
+            if printer.is_valid():
+                self._manifest = printer.get_xml_obj()
+        return self._manifest
+
+    @property
+    def resources(self):
+        """resources.arsc 的按需解析器（见 arsc.py），不会把整个资源表读入内存"""
+        if self._resources is None and RESOURCES_NAME in self.index:
+            self._resources = arsc.ResourceTable(self.index, RESOURCES_NAME)
+        return self._resources
+
+    def is_valid(self):
+        return self.manifest is not None
+
+    def _raw_attr(self, tag, name):
+        """清单中某个元素的属性原值（资源引用为 @XXXXXXXX 形式）"""
+        manifest = self.manifest
+        if manifest is None:
+            return None
+        element = manifest if tag == "manifest" else manifest.find(tag)
+        if element is None:
+            return None
+        return element.get(ANDROID_NS + name)
+
+    def _manifest_attr(self, tag, name, pick=arsc.pick_default):
+        return self._resolve(self._raw_attr(tag, name), pick)
+
+    def _prefetch(self, *attrs):
+        """把几个属性中的资源引用合并到一次资源表遍历中解析，之后的 _resolve 直接命中缓存"""
+        res_ids = []
+        for tag, name in attrs:
+            match = RESOURCE_REF_RE.match(self._raw_attr(tag, name) or "")
+            if match:
+                res_ids.append(int(match.group(1), 16))
+        if res_ids and self.resources is not None:
+            try:
+                self.resources.resolve(res_ids)
+            except Exception:
+                pass
+
+    def _resolve(self, value, pick=arsc.pick_default):
+        """把 @7F0B0001 形式的资源引用解析为实际值，解析失败时原样返回"""
+        if not value:
+            return value
+        match = RESOURCE_REF_RE.match(value)
+        if not match or self.resources is None:
+            return value
+        res_id = int(match.group(1), 16)
+        try:
+            configs = self.resources.resolve([res_id])[res_id]
+        except Exception:
+            return value
+        resolved = pick(configs)
+        return value if resolved is None else resolved
+
+    def get_package(self):
+        manifest = self.manifest
+        return manifest.get("package") if manifest is not None else None
+
+    def get_version_name(self):
+        return self._manifest_attr("manifest", "versionName")
+
+    def get_version_code(self):
+        return self._manifest_attr("manifest", "versionCode")
+
+    def get_app_label(self):
+        return self._manifest_attr("application", "label")
+
+    def get_icon(self):
+        """应用图标在 APK 中的路径（取密度最高的一个）"""
+        return self._manifest_attr("application", "icon", arsc.pick_densest)
+
+    def get_min_sdk_version(self):
+        return self._manifest_attr("uses-sdk", "minSdkVersion")
+
+    def get_target_sdk_version(self):
+        return self._manifest_attr("uses-sdk", "targetSdkVersion")
+
+    def get_permissions(self):
+        """声明的权限（包括 uses-permission-sdk-23）"""
+        manifest = self.manifest
+        if manifest is None:
+            return []
+        permissions = set()
+        for tag in ("uses-permission", "uses-permission-sdk-23"):
+            for element in manifest.iter(tag):
+                name = element.get(ANDROID_NS + "name")
+                if name:
+                    permissions.add(name)
+        return sorted(permissions)
+
+    def get_signature_info(self):
+        """各签名方案（v1/v2/v3/v4）的签名证书指纹，见 signing.read_signature_info"""
+        v1_blocks = [self.index.read(entry) for entry in self.index
+                     if signing.V1_SIGNATURE_RE.match(entry.name)]
+        return signing.read_signature_info(self._fp, self.index.cd_offset, v1_blocks, self.path)
+
+    def get_architectures(self):
+        """根据 lib/<abi>/*.so 判断支持的 CPU 架构（包括不常见的 ABI 目录）"""
+        arches = set()
+        for name in self.index.entries:
+            parsed = native_libs.split_lib_path(name)
+            if parsed:
+                arches.add(parsed[0])
+        return sorted(arches)
+
+    def get_native_libs(self):
+        """各 ABI 原生库的数量、大小、对齐和 ELF 信息，见 native_libs.native_lib_stats"""
+        return native_libs.native_lib_stats(self.index)
+
+    def section_basic(self):
+        self._prefetch(("manifest", "versionName"), ("application", "label"), ("application", "icon"))
+        return {
+            "package": self.get_package(),
+            "label": self.get_app_label(),
+            "icon": self.get_icon(),
+            "version": self.get_version_name(),
+            "version_code": self.get_version_code(),
+        }
+
+    def section_sdk(self):
+        return {
+            "min_sdk": self.get_min_sdk_version(),
+            "target_sdk": self.get_target_sdk_version(),
+        }
+
+    def section_abis(self):
+        return self.get_architectures()
+
+    def section_signature(self):
+        try:
+            return self.get_signature_info()
+        except Exception as e:
+            return {"schemes": [], "certificates": [], "error": str(e)}
+
+    def section_permissions(self):
+        return self.get_permissions()
+
+    def section_native_libs(self):
+        try:
+            return self.get_native_libs()
+        except BadZipFile:
+            return {}  # 本地文件头损坏时保留 abis 段的架构列表
+
+    def iter_sections(self, names=SECTIONS):
+        """按给定顺序（默认 SECTIONS）逐段产出 (段名, 数据)，调用方可以每拿到一段就先显示
+
+        只请求 abis、signature、native_libs 时不会解析清单，也不会加载 pyaxmlparser。
+        """
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            raise ValueError(f"未知的分段: {', '.join(unknown)}")
+        if any(name in MANIFEST_SECTIONS for name in names) and not self.is_valid():
+            raise ValueError("无效的APK文件")
+        for name in names:
+            with instrument.span("apk." + name):
+                data = getattr(self, "section_" + name)()
+            yield name, data
@@ -0,0 +1,286 @@
+"""resources.arsc 的流式按需解析
+
+大型应用的 resources.arsc 可达几十 MB，而界面只需要解析少数几个资源引用
+（应用名称、图标、versionName 等）。这里不把整个资源表读入内存，而是通过
+ZipIndex.open() 的只进流分两遍读取：
+第一遍遍历各个类型块，只读出目标资源 ID 对应的条目（引用其他资源时再走一遍），
+第二遍只读取全局字符串池中用到的那几个字符串。
+资源表未压缩存储时（targetSdk 30 起的要求），跳过数据只是移动位置；
+压缩存储时跳过的数据边解压边丢弃。两种情况下内存占用都与资源表大小无关。
+"""
+import struct
+
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+
+UTF8_FLAG = 0x100
+
+# ResTable_type.flags
+TYPE_FLAG_SPARSE = 0x01
+TYPE_FLAG_OFFSET16 = 0x02
+
+# ResTable_entry.flags
+ENTRY_FLAG_COMPLEX = 0x0001
+ENTRY_FLAG_COMPACT = 0x0008
+
+NO_ENTRY = 0xFFFFFFFF
+NO_ENTRY16 = 0xFFFF
+
+# Res_value.dataType
+TYPE_REFERENCE = 0x01
+TYPE_STRING = 0x03
+TYPE_DYNAMIC_REFERENCE = 0x07
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+
+# ResTable_config.density 中的特殊值
+DENSITY_ANY = 0xFFFE
+DENSITY_NONE = 0xFFFF
+
+MAX_REFERENCE_DEPTH = 4
+
+CHUNK_HEADER = struct.Struct("<HHI")
+
+
+def config_density(config):
+    """ResTable_config 中的屏幕密度"""
+    return struct.unpack_from("<H", config, 14)[0] if len(config) >= 16 else 0
+
+
+def is_default_config(config):
+    """不带任何限定符（语言、密度等）的默认配置"""
+    return not any(config[4:])
+
+
+def pick_default(candidates):
+    """从 [(配置, 值)] 中优先选默认配置的值，没有时取第一个"""
+    for config, value in candidates:
+        if is_default_config(config):
+            return value
+    return candidates[0][1] if candidates else None
+
+
+def pick_densest(candidates):
+    """从 [(配置, 值)] 中选屏幕密度最高的值（用于图标），anydpi/nodpi 只在没有其他选择时使用"""
+    if not candidates:
+        return None
+    def rank(item):
+        density = config_density(item[0])
+        return -1 if density in (DENSITY_ANY, DENSITY_NONE) else density
+    return max(candidates, key=rank)[1]
+
+
+class ResourceTable:
+    """按需解析 resources.arsc，resolve() 的结果会缓存"""
+
+    def __init__(self, index, name="resources.arsc"):
+        self.index = index
+        self.name = name
+        self._pool_offset = None
+        self._resolved = {}
+
+    def _open(self):
+        stream = self.index.open(self.name)
+        type_, header_size, size = CHUNK_HEADER.unpack(self._read(stream, 8))
+        if type_ != RES_TABLE_TYPE:
+            raise ValueError("不是有效的 resources.arsc")
+        stream.seek_forward(header_size)
+        return stream, min(size, stream.size)
+
+    @staticmethod
+    def _read(stream, n):
+        data = stream.read(n)
+        if len(data) != n:
+            raise ValueError("resources.arsc 数据被截断")
+        return data
+
+    def resolve(self, res_ids):
+        """解析一组资源 ID，返回 {资源ID: [(配置, 值)]}
+
+        值为字符串（文件资源为其在 APK 中的路径）、整数或布尔值；
+        引用会继续解析，超过 MAX_REFERENCE_DEPTH 层或找不到的引用保留为 "@XXXXXXXX"。
+        """
+        pending = {res_id for res_id in res_ids if res_id not in self._resolved}
+        raw = {}
+        for _ in range(MAX_REFERENCE_DEPTH):
+            if not pending:
+                break
+            found = self._scan_entries(pending)
+            raw.update(found)
+            pending = set()
+            for values in found.values():
+                for _, data_type, data in values:
+                    if data_type in (TYPE_REFERENCE, TYPE_DYNAMIC_REFERENCE) \
+                            and data not in raw and data not in self._resolved:
+                        pending.add(data)
+            for res_id in pending:
+                raw.setdefault(res_id, [])
+
+        string_indexes = {data for values in raw.values()
+                          for _, data_type, data in values if data_type == TYPE_STRING}
+        strings = self._read_strings(string_indexes) if string_indexes else {}
+
+        def convert(res_id, depth):
+            if res_id in self._resolved:
+                return self._resolved[res_id]
+            values = raw.get(res_id)
+            if not values or depth >= MAX_REFERENCE_DEPTH:
+                return None
+            result = []
+            for config, data_type, data in values:
+                if data_type in (TYPE_REFERENCE, TYPE_DYNAMIC_REFERENCE):
+                    target = convert(data, depth + 1)
+                    value = pick_default(target) if target else f"@{data:08X}"
+                elif data_type == TYPE_STRING:
+                    value = strings.get(data)
+                elif data_type == TYPE_INT_BOOLEAN:
+                    value = data != 0
+                elif data_type == TYPE_INT_DEC:
+                    value = struct.unpack("<i", struct.pack("<I", data))[0]
+                elif data_type == TYPE_INT_HEX:
+                    value = f"0x{data:08x}"
+                else:
+                    value = data
+                result.append((config, value))
+            return result
+
+        for res_id in raw:
+            if res_id not in self._resolved:
+                self._resolved[res_id] = convert(res_id, 0) or []
+        return {res_id: self._resolved.get(res_id, []) for res_id in res_ids}
+
+    def _scan_entries(self, res_ids):
+        """第一遍：遍历类型块，读出目标 ID 的原始值 {资源ID: [(配置, 数据类型, 数据)]}"""
+        wanted = {}
+        for res_id in res_ids:
+            package_id, type_id, entry_id = res_id >> 24, (res_id >> 16) & 0xFF, res_id & 0xFFFF
+            wanted.setdefault(package_id, {}).setdefault(type_id, set()).add(entry_id)
+
+        found = {}
+        stream, end = self._open()
+        while stream.tell() + 8 <= end:
+            start = stream.tell()
+            type_, header_size, size = CHUNK_HEADER.unpack(self._read(stream, 8))
+            if size < 8:
+                raise ValueError("resources.arsc 块长度无效")
+            if type_ == RES_STRING_POOL_TYPE and self._pool_offset is None:
+                self._pool_offset = start
+            elif type_ == RES_TABLE_PACKAGE_TYPE:
+                package_id, = struct.unpack("<I", self._read(stream, 4))
+                types = wanted.get(package_id)
+                if types:
+                    stream.seek_forward(start + header_size)
+                    self._scan_package(stream, start + size, package_id, types, found)
+            stream.seek_forward(min(start + size, end))
+        return found
+
+    def _scan_package(self, stream, end, package_id, types, found):
+        while stream.tell() + 8 <= end:
+            start = stream.tell()
+            type_, header_size, size = CHUNK_HEADER.unpack(self._read(stream, 8))
+            if size < 8:
+                raise ValueError("resources.arsc 块长度无效")
+            if type_ == RES_TABLE_TYPE_TYPE:
+                type_id, flags, _, entry_count, entries_start, config_size = struct.unpack(
+                    "<BBHIII", self._read(stream, 16))
+                entry_ids = types.get(type_id)
+                if entry_ids:
+                    config = struct.pack("<I", config_size) + self._read(stream, max(0, config_size - 4))
+                    stream.seek_forward(start + header_size)
+                    offsets = self._entry_offsets(stream, flags, entry_count, entry_ids)
+                    for offset, entry_id in sorted(offsets):
+                        stream.seek_forward(start + entries_start + offset)
+                        value = self._read_entry(stream)
+                        if value is not None:
+                            res_id = (package_id << 24) | (type_id << 16) | entry_id
+                            found.setdefault(res_id, []).append((config,) + value)
+            stream.seek_forward(min(start + size, end))
+
+    def _entry_offsets(self, stream, flags, entry_count, entry_ids):
+        """读取目标条目在条目数据区中的偏移，返回 [(偏移, 条目ID)]"""
+        table_start = stream.tell()
+        offsets = []
+        if flags & TYPE_FLAG_SPARSE:
+            # 稀疏表：按条目 ID 排序的 (ID, 偏移/4) 对，分块扫描
+            remaining = entry_count
+            while remaining:
+                count = min(remaining, 4096)
+                pairs = self._read(stream, count * 4)
+                remaining -= count
+                for entry_id, offset in struct.iter_unpack("<HH", pairs):
+                    if entry_id in entry_ids:
+                        offsets.append((offset * 4, entry_id))
+            return offsets
+        width = 2 if flags & TYPE_FLAG_OFFSET16 else 4
+        for entry_id in sorted(entry_ids):
+            if entry_id >= entry_count:
+                break
+            stream.seek_forward(table_start + entry_id * width)
+            if width == 2:
+                offset, = struct.unpack("<H", self._read(stream, 2))
+                if offset != NO_ENTRY16:
+                    offsets.append((offset * 4, entry_id))
+            else:
+                offset, = struct.unpack("<I", self._read(stream, 4))
+                if offset != NO_ENTRY:
+                    offsets.append((offset, entry_id))
+        return offsets
+
+    def _read_entry(self, stream):
+        """读取一个 ResTable_entry，返回 (数据类型, 数据)；复合 (bag) 条目返回 None"""
+        size, flags, key = struct.unpack("<HHI", self._read(stream, 8))
+        if flags & ENTRY_FLAG_COMPACT:
+            # 紧凑条目：数据类型在 flags 高字节，数据直接放在 key 字段
+            return flags >> 8, key
+        if flags & ENTRY_FLAG_COMPLEX:
+            return None
+        stream.skip(size - 8)
+        _, _, data_type, data = struct.unpack("<HBBI", self._read(stream, 8))
+        return data_type, data
+
+    def _read_strings(self, indexes):
+        """第二遍：只读取全局字符串池中指定序号的字符串，返回 {序号: 字符串}"""
+        if self._pool_offset is None:
+            return {}
+        stream, _ = self._open()
+        stream.seek_forward(self._pool_offset)
+        start = self._pool_offset
+        (type_, header_size, _, string_count, _, flags,
+         strings_start, _) = struct.unpack("<HHIIIIII", self._read(stream, 28))
+        if type_ != RES_STRING_POOL_TYPE:
+            raise ValueError("resources.arsc 字符串池损坏")
+        utf8 = bool(flags & UTF8_FLAG)
+
+        positions = []
+        for i in sorted(indexes):
+            if i >= string_count:
+                break
+            stream.seek_forward(start + header_size + i * 4)
+            offset, = struct.unpack("<I", self._read(stream, 4))
+            positions.append((offset, i))
+
+        strings = {}
+        for offset, i in sorted(positions):
+            stream.seek_forward(start + strings_start + offset)
+            strings[i] = self._read_string(stream, utf8)
+        return strings
+
+    def _read_string(self, stream, utf8):
+        if utf8:
+            self._read_utf8_length(stream)  # UTF-16 长度，用不到
+            length = self._read_utf8_length(stream)
+            return self._read(stream, length).decode("utf-8", "replace")
+        length, = struct.unpack("<H", self._read(stream, 2))
+        if length & 0x8000:
+            low, = struct.unpack("<H", self._read(stream, 2))
+            length = ((length & 0x7FFF) << 16) | low
+        return self._read(stream, length * 2).decode("utf-16-le", "replace")
+
+    def _read_utf8_length(self, stream):
+        length = self._read(stream, 1)[0]
+        if length & 0x80:
+            length = ((length & 0x7F) << 8) | self._read(stream, 1)[0]
+        return length
@@ -0,0 +1,102 @@
+"""批量分析：在进程池中并行解析大量 APK，结果按完成顺序流式产出
+
+同时在途的任务数有上限，内存占用只与当前这一批结果有关，而与 APK 总数无关。
+"""
+import csv
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from apk_session import APKSession
+from common import instrument
+
+COLUMNS = ["path", "label", "package", "version", "version_code", "min_sdk", "target_sdk",
+           "abis", "permission_count", "signer_sha256", "error"]
+
+
+def summarize(path, sections):
+    """从分段解析结果中提取批量表格需要的一行数据"""
+    row = dict.fromkeys(COLUMNS)
+    row["path"] = path
+    row.update(sections["basic"])
+    row.update(sections["sdk"])
+    row["abis"] = ";".join(sections["abis"])
+    row["permission_count"] = len(sections["permissions"])
+    certificates = sections["signature"]["certificates"]
+    if certificates:
+        row["signer_sha256"] = certificates[0]["sha256"]
+    return row
+
+
+def error_row(path, message):
+    row = dict.fromkeys(COLUMNS)
+    row["path"] = path
+    row["error"] = message
+    return row
+
+
+def analyze_apk(path):
+    """解析单个 APK（在子进程中运行），返回 (路径, 分段结果, 错误信息)，出错时不抛出"""
+    try:
+        with APKSession(path) as apk:
+            return path, dict(apk.iter_sections()), None
+    except Exception as e:
+        return path, None, str(e) or type(e).__name__
+
+
+def iter_batch_results(paths, workers=None, window=None, cache=None, skip_unchanged=False):
+    """在进程池中分析 paths，按完成顺序产出结果行
+
+    最多同时提交 window 个任务（默认为进程数的 4 倍），
+    提前关闭生成器会取消尚未开始的任务。
+    给出 cache 时，未变化的 APK 直接使用缓存结果（行中 cached 为 True），
+    skip_unchanged 为真时则完全跳过它们；新解析的结果会写回缓存。
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+
+    def finish(future):
+        path, sections, error = future.result()
+        if error is not None:
+            return error_row(path, error)
+        if cache is not None:
+            cache.put(path, sections)
+        return summarize(path, sections)
+
+    # fork 出的子进程会继承已开启的记录状态，先关掉
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=instrument.disable)
+    try:
+        pending = set()
+        for path in paths:
+            sections = cache.get(path) if cache is not None else None
+            if sections is not None:
+                if not skip_unchanged:
+                    row = summarize(path, sections)
+                    row["cached"] = True
+                    yield row
+                continue
+            pending.add(pool.submit(analyze_apk, path))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(future)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def write_csv(rows, fp):
+    """把结果行写成 CSV"""
+    writer = csv.DictWriter(fp, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_ndjson(rows, fp):
+    """把结果行写成每行一个 JSON 对象"""
+    for row in rows:
+        fp.write(json.dumps(row, ensure_ascii=False) + "\n")
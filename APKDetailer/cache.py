@@ -0,0 +1,184 @@
+"""APK 分析结果的磁盘缓存
+
+以文件身份 (设备, inode, 大小, 修改时间) 为键，结果用 zlib 压缩的 JSON 保存在 SQLite 中，
+总大小超过上限时按最近访问时间淘汰。可选再校验签名块和中央目录的摘要：
+中央目录记录了每个条目的 CRC 和大小，只要内容有变化摘要就会不同，
+重新签名只改动签名块，也会被发现；读取它们只需要文件末尾的一小段，不必读完整个 APK。
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from zipfile import BadZipFile
+
+from apk_session import ANALYSIS_VERSION
+from common import instrument
+from signing import signing_block_offset
+from zipindex import locate_central_directory
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_path():
+    """缓存文件的默认位置"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "APKDetailer", "analysis-cache.sqlite3")
+
+
+def file_identity(path):
+    """文件身份：(设备, inode, 大小, 修改时间纳秒)"""
+    st = os.stat(path)
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def content_digest(path):
+    """对 APK Signing Block（如果有）、中央目录和 EOCD 计算 SHA-256，作为内容摘要"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        cd_offset, _, _, _ = locate_central_directory(f, size)
+        start = signing_block_offset(f, cd_offset)
+        if start is None:
+            start = cd_offset
+        f.seek(start)
+        h = hashlib.sha256()
+        remaining = size - start
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+        instrument.count("zip.bytes_read", size - start - remaining)
+    return h.hexdigest()
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return {"$bytes": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and "$bytes" in obj:
+        return base64.b64decode(obj["$bytes"])
+    return obj
+
+
+def encode_payload(sections):
+    return zlib.compress(json.dumps(sections, default=_json_default,
+                                    separators=(",", ":")).encode("utf-8"))
+
+
+def decode_payload(payload):
+    return json.loads(zlib.decompress(payload).decode("utf-8"), object_hook=_json_object_hook)
+
+
+class AnalysisCache:
+    """分析结果缓存；SQLite 连接不能跨线程使用，每个线程各自创建实例"""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, verify_digest=False):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.verify_digest = verify_digest
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != ANALYSIS_VERSION:
+            # 分析结果的结构变了，旧缓存全部作废
+            self._db.execute("DROP TABLE IF EXISTS entries")
+            self._db.execute(f"PRAGMA user_version = {int(ANALYSIS_VERSION)}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                dev INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER,
+                path TEXT, digest TEXT, payload BLOB, nbytes INTEGER, accessed REAL,
+                PRIMARY KEY (dev, inode, size, mtime_ns)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, path):
+        """返回缓存的分析结果；文件已变化或没有缓存时返回 None"""
+        try:
+            key = file_identity(path)
+        except OSError:
+            return None
+        row = self._db.execute(
+            "SELECT digest, payload FROM entries WHERE dev=? AND inode=? AND size=? AND mtime_ns=?",
+            key).fetchone()
+        if row is None:
+            return None
+        digest, payload = row
+        if self.verify_digest:
+            # 未开启校验时写入的条目没有摘要，视为未命中，重新分析后会补上
+            if digest is None:
+                return None
+            try:
+                if content_digest(path) != digest:
+                    return None
+            except (OSError, ValueError, BadZipFile):
+                return None
+        self._db.execute(
+            "UPDATE entries SET accessed=?, path=? WHERE dev=? AND inode=? AND size=? AND mtime_ns=?",
+            (time.time(), path) + key)
+        self._db.commit()
+        try:
+            return decode_payload(payload)
+        except (ValueError, zlib.error):
+            return None
+
+    def put(self, path, sections):
+        """保存分析结果，必要时淘汰最久未访问的条目；只有开启 verify_digest 时才计算内容摘要"""
+        try:
+            key = file_identity(path)
+            digest = content_digest(path) if self.verify_digest else None
+        except (OSError, ValueError, BadZipFile):
+            return
+        payload = encode_payload(sections)
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (path, digest, payload, len(payload), time.time()))
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = total - self.max_bytes * 9 // 10
+        freed = 0
+        victims = []
+        for rowid, nbytes in self._db.execute(
+                "SELECT rowid, nbytes FROM entries ORDER BY accessed"):
+            victims.append((rowid,))
+            freed += nbytes
+            if freed >= target:
+                break
+        self._db.executemany("DELETE FROM entries WHERE rowid=?", victims)
+
+    def clear(self):
+        self._db.execute("DELETE FROM entries")
+        self._db.commit()
+
+
+def open_cache(**kwargs):
+    """打开缓存；缓存目录不可写等情况下返回 None，调用方直接跳过缓存即可"""
+    try:
+        return AnalysisCache(**kwargs)
+    except (OSError, sqlite3.Error):
+        return None
@@ -1,14 +1,30 @@
+import json
 import os
 import sys
-from zipfile import ZipFile
+import time
+from functools import partial
+import multiprocessing
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
     QPushButton, QLabel, QFileDialog, QMessageBox, QScrollArea,
-    QGroupBox, QFrame, QSizePolicy, QTextEdit
+    QGroupBox, QFrame, QTextEdit, QDialog, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QCheckBox, QLineEdit, QTreeView
+)
+from PyQt6.QtCore import Qt, QSize, QSortFilterProxyModel
+from PyQt6.QtGui import QIcon, QFont, QAction, QColor, QStandardItem, QStandardItemModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument, qt_jobs
+from common.formatting import format_size
+from common.scheduler import CPU, HIGH, IO
+import apk_diff
+import apk_paths
+import batch
+import cache
+from apk_session import APKSession, SECTIONS
+from permissions import (
+    CUSTOM, DANGEROUS, NORMAL, SIGNATURE, SPECIAL_ACCESS_PERMISSIONS, group_permissions
 )
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QIcon, QFont, QAction
-from pyaxmlparser import APK
 
 def resource_path(relative_path):
     """获取资源路径，兼容打包后的路径"""
@@ -18,12 +34,239 @@ def resource_path(relative_path):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, relative_path)
 
+
+def parse_apk(ctx, file_path, verify_cache=False):
+    """后台任务：分段解析 APK，每完成一段通过 ctx.report(section, data) 上报，可通过 ctx.token 取消"""
+    with instrument.span("apk.parse", file=os.path.basename(file_path)):
+        analysis_cache = cache.open_cache(verify_digest=verify_cache)
+        try:
+            sections = analysis_cache.get(file_path) if analysis_cache else None
+            if sections is not None:
+                # 文件没有变化，直接使用缓存结果
+                for section in SECTIONS:
+                    ctx.report(section, sections[section])
+                return
+            sections = {}
+            with APKSession(file_path) as apk:
+                for section, data in apk.iter_sections():
+                    ctx.token.raise_if_cancelled()
+                    sections[section] = data
+                    ctx.report(section, data)
+            if analysis_cache:
+                analysis_cache.put(file_path, sections)
+        finally:
+            if analysis_cache:
+                analysis_cache.close()
+
+def compare_apks(ctx, old_path, new_path):
+    """后台任务：对比两个 APK，返回差异报告"""
+    return apk_diff.diff_apks(old_path, new_path)
+
+BATCH_FLUSH_INTERVAL = 0.2  # 秒
+BATCH_FLUSH_ROWS = 64
+
+
+def run_batch(ctx, inputs, skip_unchanged=False, verify_cache=False):
+    """后台任务：驱动进程池批量分析，先上报 ("total", APK 总数)，再按小批次上报 ("rows", 结果行列表)
+
+    可通过 ctx.token 取消，取消后尚未开始的 APK 不再解析。
+    """
+    analysis_cache = cache.open_cache(verify_digest=verify_cache)
+    try:
+        paths = list(apk_paths.collect_apk_paths(inputs))
+        ctx.report("total", len(paths))
+        results = batch.iter_batch_results(paths, cache=analysis_cache, skip_unchanged=skip_unchanged)
+        try:
+            chunk = []
+            last_flush = time.monotonic()
+            for row in results:
+                ctx.token.raise_if_cancelled()
+                chunk.append(row)
+                now = time.monotonic()
+                if len(chunk) >= BATCH_FLUSH_ROWS or now - last_flush >= BATCH_FLUSH_INTERVAL:
+                    ctx.report("rows", chunk)
+                    chunk = []
+                    last_flush = now
+            if chunk:
+                ctx.report("rows", chunk)
+        finally:
+            results.close()  # 取消尚未开始的任务
+    finally:
+        if analysis_cache:
+            analysis_cache.close()
+
+class BatchDialog(QDialog):
+    """批量分析结果表格，可排序、可导出"""
+    HEADERS = [
+        ("path", "文件"), ("label", "应用名称"), ("package", "包名"), ("version", "版本名称"),
+        ("version_code", "版本代码"), ("min_sdk", "最小SDK"), ("target_sdk", "目标SDK"),
+        ("abis", "架构"), ("permission_count", "权限数"), ("signer_sha256", "签名指纹 (SHA-256)"),
+        ("error", "错误"),
+    ]
+    NUMERIC = {"version_code", "min_sdk", "target_sdk", "permission_count"}
+
+    def __init__(self, inputs, skip_unchanged=False, verify_cache=False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("批量分析")
+        self.resize(1100, 600)
+        self.total = 0
+        self.skip_unchanged = skip_unchanged
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel("正在查找APK文件...")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels([title for _, title in self.HEADERS])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.stop_button = QPushButton("停止")
+        self.stop_button.clicked.connect(self.stop)
+        export_csv = QPushButton("导出 CSV")
+        export_csv.clicked.connect(lambda: self.export("csv"))
+        export_ndjson = QPushButton("导出 NDJSON")
+        export_ndjson.clicked.connect(lambda: self.export("ndjson"))
+        button_layout.addWidget(self.stop_button)
+        button_layout.addStretch()
+        button_layout.addWidget(export_csv)
+        button_layout.addWidget(export_ndjson)
+        layout.addLayout(button_layout)
+
+        # 驱动任务大部分时间在等待子进程，解析本身在进程池中进行，放在 cpu 通道，不占用 io 通道
+        self.job = qt_jobs.QtJob(run_batch, inputs, skip_unchanged, verify_cache,
+                                 parent=self, lane=CPU, name="apk.run_batch")
+        self.job.reported.connect(self.on_batch_report)
+        self.job.failed.connect(self.on_batch_failed)
+        self.job.finished.connect(self.on_finished)
+        self.job.start()
+
+    def on_batch_report(self, payload):
+        kind, data = payload
+        if kind == "total":
+            self.total = data
+            self.update_status()
+        else:
+            self.add_rows(data)
+
+    def on_batch_failed(self, message):
+        QMessageBox.critical(self, "错误", f"批量分析失败: {message}")
+
+    def update_status(self, done=False):
+        text = f"已完成 {self.table.rowCount()} / 共 {self.total}"
+        if self.skip_unchanged:
+            text += "（未变化的APK已跳过）"
+        self.status_label.setText(text + ("（已结束）" if done else ""))
+
+    def add_rows(self, rows):
+        """追加一批结果行；插入期间关闭排序，避免每行都重新排序"""
+        self.table.setSortingEnabled(False)
+        for row in rows:
+            index = self.table.rowCount()
+            self.table.insertRow(index)
+            for column, (key, _) in enumerate(self.HEADERS):
+                value = row.get(key)
+                item = QTableWidgetItem()
+                if key in self.NUMERIC and value is not None and str(value).isdigit():
+                    item.setData(Qt.ItemDataRole.DisplayRole, int(value))
+                else:
+                    item.setText("" if value is None else str(value))
+                if column == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, row)
+                self.table.setItem(index, column, item)
+        self.table.setSortingEnabled(True)
+        self.update_status()
+
+    def stop(self):
+        self.job.cancel()
+        self.stop_button.setEnabled(False)
+
+    def on_finished(self):
+        self.stop_button.setEnabled(False)
+        self.update_status(done=True)
+
+    def export(self, fmt):
+        """按表格当前顺序导出结果"""
+        if fmt == "csv":
+            file_path, _ = QFileDialog.getSaveFileName(self, "导出 CSV", "", "CSV 文件 (*.csv)")
+        else:
+            file_path, _ = QFileDialog.getSaveFileName(self, "导出 NDJSON", "", "NDJSON 文件 (*.ndjson *.jsonl)")
+        if not file_path:
+            return
+        rows = (self.table.item(i, 0).data(Qt.ItemDataRole.UserRole) for i in range(self.table.rowCount()))
+        try:
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                if fmt == "csv":
+                    batch.write_csv(rows, f)
+                else:
+                    batch.write_ndjson(rows, f)
+            QMessageBox.information(self, "成功", "结果已导出")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
+
+    def closeEvent(self, event):
+        """关闭窗口时取消批量分析，不等待：正在解析的 APK 在后台完成后任务自行结束"""
+        self.job.cancel()
+        super().closeEvent(event)
+
+    def reject(self):
+        self.close()
+
+class DiffDialog(QDialog):
+    """两个 APK 的差异报告，可导出为 JSON"""
+
+    def __init__(self, report, parent=None):
+        super().__init__(parent)
+        self.report = report
+        self.setWindowTitle("APK 差异对比")
+        self.resize(900, 650)
+
+        layout = QVBoxLayout(self)
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        text.setFont(QFont("Consolas", 10))
+        text.setPlainText("\n".join(apk_diff.iter_report_lines(report)))
+        layout.addWidget(text)
+
+        button_layout = QHBoxLayout()
+        export_json = QPushButton("导出 JSON")
+        export_json.clicked.connect(self.export)
+        button_layout.addStretch()
+        button_layout.addWidget(export_json)
+        layout.addLayout(button_layout)
+
+    def export(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出 JSON", "", "JSON 文件 (*.json)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(self.report, f, ensure_ascii=False, indent=2)
+            QMessageBox.information(self, "成功", "差异报告已导出")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
+
 class APKInfoTool(QMainWindow):
+    # 各保护级别权限的文字颜色
+    PERMISSION_COLORS = {
+        DANGEROUS: "#c0392b",
+        SIGNATURE: "#8e44ad",
+        NORMAL: "#2c3e50",
+        CUSTOM: "#7f8c8d",
+    }
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("APK 信息解析工具")
         self.setMinimumSize(QSize(900, 600))
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
+        self.parse_generation = 0  # 每次新的解析加一，用于丢弃过期结果
+        self.parse_job = None  # 正在进行的解析任务
         self.init_ui()
         self.setAcceptDrops(True)
 
@@ -79,9 +322,25 @@ class APKInfoTool(QMainWindow):
         self.btn_select = QPushButton("选择APK文件")
         self.btn_select.setStyleSheet(btn_style)
         self.btn_select.clicked.connect(self.select_file)
+
+        self.btn_batch = QPushButton("批量分析文件夹")
+        self.btn_batch.setStyleSheet(btn_style)
+        self.btn_batch.clicked.connect(self.select_batch_folder)
+
+        self.btn_diff = QPushButton("对比两个APK")
+        self.btn_diff.setStyleSheet(btn_style)
+        self.btn_diff.clicked.connect(self.select_diff_files)
         
         layout.addWidget(self.drop_area)
         layout.addWidget(self.btn_select, 0, Qt.AlignmentFlag.AlignHCenter)
+        layout.addWidget(self.btn_batch, 0, Qt.AlignmentFlag.AlignHCenter)
+        layout.addWidget(self.btn_diff, 0, Qt.AlignmentFlag.AlignHCenter)
+
+        self.skip_unchanged_check = QCheckBox("批量分析时跳过上次分析后未变化的APK")
+        layout.addWidget(self.skip_unchanged_check, 0, Qt.AlignmentFlag.AlignHCenter)
+        self.verify_cache_check = QCheckBox("使用缓存前校验APK内容（修改时间不可靠时开启）")
+        self.verify_cache_check.setToolTip("比较签名块和中央目录的摘要，只读取文件末尾的一小段")
+        layout.addWidget(self.verify_cache_check, 0, Qt.AlignmentFlag.AlignHCenter)
         layout.addStretch()
         return layout
 
@@ -95,9 +354,11 @@ class APKInfoTool(QMainWindow):
         
         # 基本信息组
         self.basic_group = self.create_info_group("基本信息", [
+            ("应用名称", "label"),
             ("包名", "package"),
             ("版本名称", "version"),
-            ("版本代码", "version_code")
+            ("版本代码", "version_code"),
+            ("图标", "icon")
         ])
         
         # SDK信息组
@@ -144,7 +405,7 @@ class APKInfoTool(QMainWindow):
     
         self.signature_group.layout().addWidget(self.signature_content)
         
-        # 权限信息组（无滚动版）
+        # 权限信息组
         self.permission_group = QGroupBox("权限列表")
         self.permission_group.setStyleSheet("""
             QGroupBox {
@@ -159,25 +420,30 @@ class APKInfoTool(QMainWindow):
             }
         """)
 
-        # 主布局配置
-        self.permission_layout = QVBoxLayout()
-        self.permission_layout.setContentsMargins(8, 8, 8, 8)
-        self.permission_layout.setSpacing(5)
+        # 过滤框 + 分组树：每次只重建模型，不再为每个权限创建控件
+        self.permission_filter = QLineEdit()
+        self.permission_filter.setPlaceholderText("过滤权限...")
+        self.permission_filter.setClearButtonEnabled(True)
 
-        # 内容容器
-        self.permission_content = QWidget()
-        self.permission_content.setLayout(self.permission_layout)
+        self.permission_model = QStandardItemModel(self)
+        self.permission_proxy = QSortFilterProxyModel(self)
+        self.permission_proxy.setSourceModel(self.permission_model)
+        self.permission_proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.permission_proxy.setRecursiveFilteringEnabled(True)
+        self.permission_filter.textChanged.connect(self.filter_permissions)
 
-        # 将容器添加到分组
-        self.permission_group.setLayout(QVBoxLayout())
-        self.permission_group.layout().addWidget(self.permission_content)
-        self.permission_group.layout().setContentsMargins(0, 0, 0, 0)
+        self.permission_view = QTreeView()
+        self.permission_view.setModel(self.permission_proxy)
+        self.permission_view.setHeaderHidden(True)
+        self.permission_view.setUniformRowHeights(True)
+        self.permission_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.permission_view.setMinimumHeight(260)
 
-        # 设置尺寸策略
-        self.permission_content.setSizePolicy(
-            QSizePolicy.Policy.Expanding,
-            QSizePolicy.Policy.Expanding
-        )
+        permission_layout = QVBoxLayout()
+        permission_layout.setContentsMargins(8, 8, 8, 8)
+        permission_layout.addWidget(self.permission_filter)
+        permission_layout.addWidget(self.permission_view)
+        self.permission_group.setLayout(permission_layout)
         
         # 添加到布局
         groups = [
@@ -227,10 +493,12 @@ class APKInfoTool(QMainWindow):
             event.acceptProposedAction()
 
     def dropEvent(self, event):
-        url = event.mimeData().urls()[0]
-        file_path = url.toLocalFile()
-        if file_path.lower().endswith(".apk"):
-            self.process_apk(file_path)
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        if len(paths) == 1 and paths[0].lower().endswith(".apk"):
+            self.process_apk(paths[0])
+        elif any(os.path.isdir(p) or p.lower().endswith(".apk") for p in paths):
+            # 拖入多个文件或文件夹时进入批量模式
+            self.open_batch(paths)
         else:
             QMessageBox.warning(self, "错误", "请拖放有效的APK文件")
 
@@ -241,62 +509,140 @@ class APKInfoTool(QMainWindow):
         if file_path:
             self.process_apk(file_path)
 
+    def select_batch_folder(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "选择包含APK的文件夹")
+        if dir_path:
+            self.open_batch([dir_path])
+
+    def open_batch(self, paths):
+        """打开批量分析窗口"""
+        dialog = BatchDialog(paths, self.skip_unchanged_check.isChecked(),
+                             self.verify_cache_check.isChecked(), self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
+    def select_diff_files(self):
+        old_path, _ = QFileDialog.getOpenFileName(self, "选择旧版本APK", "", "APK文件 (*.apk)")
+        if not old_path:
+            return
+        new_path, _ = QFileDialog.getOpenFileName(
+            self, "选择新版本APK", os.path.dirname(old_path), "APK文件 (*.apk)")
+        if new_path:
+            self.open_diff(old_path, new_path)
+
+    def open_diff(self, old_path, new_path):
+        """在后台对比两个 APK，完成后弹出差异报告"""
+        job = qt_jobs.QtJob(compare_apks, old_path, new_path,
+                            parent=self, lane=IO, name="apk.compare_apks")
+        job.succeeded.connect(self.show_diff)
+        job.failed.connect(lambda message: QMessageBox.critical(self, "错误", f"对比失败: {message}"))
+        job.finished.connect(job.deleteLater)
+        job.start()
+
+    def show_diff(self, report):
+        dialog = DiffDialog(report, self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
     def process_apk(self, file_path):
-        """处理APK文件"""
-        try:
-            self.drop_area.setText(os.path.basename(file_path))
-            self.drop_area.setStyleSheet("""
-                QLabel {
-                    border: 3px dashed #2ecc71;
-                    color: #27ae60;
-                }
-            """)
-            
-            apk = APK(file_path)
-            if not apk.is_valid_APK():
-                raise ValueError("无效的APK文件")
-            
-            # 更新基本信息
-            self.update_field("package", apk.get_package())
-            self.update_field("version", apk.get_androidversion_name() or "未知")
-            self.update_field("version_code", str(apk.get_androidversion_code() or "未知"))
-            
-            # 更新SDK信息
-            self.update_field("min_sdk", apk.get_min_sdk_version() or "未知")
-            self.update_field("target_sdk", apk.get_target_sdk_version() or "未知")
-            
-            # 更新架构信息
-            arches = self.get_supported_architectures(file_path)
-            self.arch_content.setText("\n".join([f"• {arch}" for arch in arches]) if arches else "未检测到原生库")
-            
-            # 更新签名信息（带换行格式）
-            signature_data = apk.get_signature()
-            if signature_data:
-                try:
-                    # 生成十六进制列表
-                    hex_bytes = [f"{b:02x}" for b in signature_data]
-
-                    # 按10个字节分组
-                    grouped = []
-                    for i in range(0, len(hex_bytes), 10):
-                        group = hex_bytes[i:i+10]
-                        grouped.append(" ".join(group))
-                
-                    # 转换为大写并添加换行
-                    formatted_signature = "\n".join(grouped).upper()
-                    self.signature_content.setPlainText(formatted_signature)
-                
-                except Exception as e:
-                    self.signature_content.setPlainText(f"签名解析错误: {str(e)}")
-            else:
-                self.signature_content.setPlainText("未获取到签名信息")
-            
-            # 更新权限列表
-            self.update_permissions(apk.get_permissions())
-            
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"解析失败: {str(e)}")
-            self.reset_ui()
+        """处理APK文件：在后台线程中分段解析，每段解析完成后立即显示"""
+        self.cancel_parse()
+        self.drop_area.setText(os.path.basename(file_path))
+        self.drop_area.setStyleSheet("""
+            QLabel {
+                border: 3px dashed #2ecc71;
+                color: #27ae60;
+            }
+        """)
+        self.show_pending()
+
+        self.parse_generation += 1
+        # 结果信号绑定本次的 generation，过期任务在取消前已发出的信号会被丢弃
+        job = qt_jobs.QtJob(parse_apk, file_path, self.verify_cache_check.isChecked(),
+                            parent=self, lane=IO, priority=HIGH, name="apk.parse_apk")
+        job.reported.connect(partial(self.on_section_ready, self.parse_generation))
+        job.failed.connect(partial(self.on_parse_failed, self.parse_generation))
+        job.finished.connect(job.deleteLater)
+        self.parse_job = job
+        job.start()
+
+    def cancel_parse(self):
+        """取消正在进行的解析（当前段完成后停止，结果被丢弃）"""
+        if self.parse_job is not None:
+            self.parse_job.cancel()
+            self.parse_job = None
+
+    def on_section_ready(self, generation, payload):
+        """收到一段解析结果"""
+        section, data = payload
+        if generation != self.parse_generation:
+            return  # 已被新的拖放取代
+        getattr(self, f"show_{section}")(data)
+
+    def on_parse_failed(self, generation, message):
+        if generation != self.parse_generation:
+            return
+        QMessageBox.critical(self, "错误", f"解析失败: {message}")
+        self.reset_ui()
+
+    def show_basic(self, info):
+        """更新基本信息"""
+        self.update_field("label", info["label"] or "未知")
+        self.update_field("package", info["package"])
+        self.update_field("version", info["version"] or "未知")
+        self.update_field("version_code", str(info["version_code"] or "未知"))
+        self.update_field("icon", info["icon"] or "未知")
+
+    def show_sdk(self, info):
+        """更新SDK信息"""
+        self.update_field("min_sdk", info["min_sdk"] or "未知")
+        self.update_field("target_sdk", info["target_sdk"] or "未知")
+
+    def show_abis(self, arches):
+        """更新架构信息"""
+        self.arch_content.setText("\n".join([f"• {arch}" for arch in arches]) if arches else "未检测到原生库")
+
+    def show_native_libs(self, stats):
+        """用各 ABI 的原生库统计替换简单的架构列表"""
+        if not stats:
+            return
+        lines = []
+        for abi, group in stats.items():
+            elf = sorted({f"{lib['machine']}, {lib['bits']} 位" for lib in group["libs"] if lib["machine"]})
+            lines.append(f"• {abi}" + (f"  ({'; '.join(elf)})" if elf else ""))
+            lines.append(
+                f"    {group['count']} 个库，压缩后 {format_size(group['compressed'])}，"
+                f"解压后 {format_size(group['uncompressed'])}"
+            )
+            lines.append(
+                f"    未压缩存储 {group['stored']}/{group['count']}，"
+                f"4K 页对齐 {group['aligned']}/{group['count']}，"
+                f"16K 页对齐 {group['aligned_16k']}/{group['count']}"
+            )
+            if group["mismatched"]:
+                lines.append(f"    ⚠ {group['mismatched']} 个库的 ELF 架构与目录不符")
+        self.arch_content.setText("\n".join(lines))
+
+    def show_signature(self, signature):
+        """更新签名信息：签名方案与各证书的指纹"""
+        if signature.get("error"):
+            self.signature_content.setPlainText(f"签名解析错误: {signature['error']}")
+            return
+        if not signature["certificates"]:
+            self.signature_content.setPlainText("未获取到签名信息")
+            return
+
+        lines = [f"签名方案: {', '.join(signature['schemes'])}"]
+        for number, cert in enumerate(signature["certificates"], 1):
+            title = f"证书 {number} ({', '.join(cert['schemes'])})"
+            if cert.get("min_sdk") is not None:
+                title += f"  SDK {cert['min_sdk']}-{cert['max_sdk']}"
+            lines += ["", title, f"SHA-256: {cert['sha256']}", f"SHA-1:   {cert['sha1']}"]
+        self.signature_content.setPlainText("\n".join(lines))
+
+    def show_permissions(self, permissions):
+        """更新权限列表"""
+        self.update_permissions(permissions)
 
     def add_copy_button(self):
         """添加浮动复制按钮"""
@@ -337,52 +683,41 @@ class APKInfoTool(QMainWindow):
             label.setText(safe_value)
             label.setStyleSheet("color: #e67e22;" if safe_value == "未知" else "")
 
-    def get_supported_architectures(self, apk_path):
-        """获取支持的CPU架构"""
-        arches = set()
-        try:
-            with ZipFile(apk_path, 'r') as z:
-                for f in z.namelist():
-                    if f.startswith('lib/'):
-                        parts = f.split('/')
-                        if len(parts) > 1 and parts[1] in [
-                            'armeabi', 'armeabi-v7a', 
-                            'arm64-v8a', 'x86', 
-                            'x86_64', 'mips', 'mips64'
-                        ]:
-                            arches.add(parts[1])
-        except Exception as e:
-            print(f"Error reading APK: {str(e)}")
-        return sorted(arches)
-
     def update_permissions(self, permissions):
-        """更新权限列表（无滚动版）"""
-        # 清空现有内容
-        while self.permission_layout.count():
-            item = self.permission_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-    
+        """按保护级别分组显示权限"""
         if not permissions:
-            label = QLabel("未检测到特殊权限")
-            label.setStyleSheet("color: #95a5a6; padding: 10px;")
-            self.permission_layout.addWidget(label)
-        else:
-            for perm in sorted(permissions):
-                label = QLabel(f"• {perm}")
-                label.setStyleSheet("""
-                    QLabel {
-                        color: #c0392b; 
-                        margin: 3px 0;
-                        padding: 2px 5px;
-                        background: #f9f9f9;
-                        border-radius: 3px;
-                    }
-                """)
-                label.setWordWrap(True)
-                self.permission_layout.addWidget(label)
-    
-        self.permission_layout.addStretch()
+            self.show_permission_placeholder("未检测到特殊权限")
+            return
+        self.permission_model.clear()
+        root = self.permission_model.invisibleRootItem()
+        for level, title, names in group_permissions(permissions):
+            group = QStandardItem(f"{title} ({len(names)})")
+            font = group.font()
+            font.setBold(True)
+            group.setFont(font)
+            color = QColor(self.PERMISSION_COLORS[level])
+            group.appendRows([self.permission_item(name, color) for name in names])
+            root.appendRow(group)
+        self.permission_view.expandAll()
+
+    def show_permission_placeholder(self, text):
+        """权限列表中只显示一行灰色提示"""
+        self.permission_model.clear()
+        item = QStandardItem(text)
+        item.setForeground(QColor("#95a5a6"))
+        self.permission_model.invisibleRootItem().appendRow(item)
+
+    @staticmethod
+    def permission_item(name, color):
+        item = QStandardItem(name)
+        item.setForeground(color)
+        if name in SPECIAL_ACCESS_PERMISSIONS:
+            item.setToolTip("特殊权限：需要用户在系统设置中单独授予")
+        return item
+
+    def filter_permissions(self, text):
+        self.permission_proxy.setFilterFixedString(text)
+        self.permission_view.expandAll()
 
     def reset_ui(self):
         """重置界面状态"""
@@ -393,13 +728,29 @@ class APKInfoTool(QMainWindow):
                 color: #7f8c8d;
             }
         """)
-        for field in ["package", "version", "version_code", "min_sdk", "target_sdk"]:
+        for field in ["label", "package", "version", "version_code", "icon", "min_sdk", "target_sdk"]:
             self.update_field(field, "")
         self.arch_content.setText("等待解析...")
         self.signature_content.setText("等待解析...")
-        self.update_permissions([])
+        self.show_permission_placeholder("等待解析...")
+
+    def show_pending(self):
+        """新的解析开始时，把所有分组标记为解析中"""
+        for field in ["label", "package", "version", "version_code", "icon", "min_sdk", "target_sdk"]:
+            self.update_field(field, "解析中...")
+        self.arch_content.setText("解析中...")
+        self.signature_content.setText("解析中...")
+        # 权限分段到达后才调用 update_permissions，之前不能显示“未检测到”
+        self.show_permission_placeholder("解析中...")
+
+    def closeEvent(self, event):
+        """关闭窗口前取消后台解析"""
+        self.cancel_parse()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后批量分析的子进程需要
+    instrument.setup_from_argv(sys.argv)
     app = QApplication(sys.argv)
     window = APKInfoTool()
     window.show()
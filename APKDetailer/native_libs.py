@@ -0,0 +1,113 @@
+"""原生库 (lib/<abi>/*.so) 按 ABI 统计
+
+数量和大小直接来自中央目录；是否“未压缩存储且页对齐”需要本地文件头给出的数据偏移；
+ELF 头只读取每个条目开头的几十字节（压缩条目只解压开头一小段），不会解压整个库。
+"""
+import struct
+import zlib
+
+from common import instrument
+from zipindex import DEFLATED, STORED, read_at
+
+ELF_MAGIC = b"\x7fELF"
+ELF_MACHINES = {
+    3: "x86",
+    8: "MIPS",
+    40: "ARM",
+    62: "x86-64",
+    183: "AArch64",
+    243: "RISC-V",
+}
+# 各 ABI 目录应当对应的 ELF 机器类型，用于发现放错目录的库
+ABI_MACHINES = {
+    "armeabi": "ARM",
+    "armeabi-v7a": "ARM",
+    "arm64-v8a": "AArch64",
+    "x86": "x86",
+    "x86_64": "x86-64",
+    "mips": "MIPS",
+    "mips64": "MIPS",
+    "riscv64": "RISC-V",
+}
+PAGE_SIZE = 4096
+LARGE_PAGE_SIZE = 16384
+ELF_HEADER_BYTES = 20
+COMPRESSED_PROBE_BYTES = 1024
+
+
+def split_lib_path(name):
+    """lib/<abi>/<文件>.so 返回 (abi, 文件名)，其他路径返回 None"""
+    parts = name.split("/")
+    if len(parts) == 3 and parts[0] == "lib" and parts[1] and parts[2].endswith(".so"):
+        return parts[1], parts[2]
+    return None
+
+
+def parse_elf_header(head):
+    """解析 ELF 头的位数和机器类型，返回 (位数, 机器名)；不是 ELF 时返回 (None, None)"""
+    if len(head) < ELF_HEADER_BYTES or not head.startswith(ELF_MAGIC):
+        return None, None
+    bits = {1: 32, 2: 64}.get(head[4])
+    endian = ">" if head[5] == 2 else "<"
+    machine, = struct.unpack_from(endian + "H", head, 18)
+    return bits, ELF_MACHINES.get(machine, f"未知 ({machine})")
+
+
+def read_entry_head(index, entry, data_offset, size=ELF_HEADER_BYTES):
+    """读取条目解压后内容的前 size 字节"""
+    if entry.compress_type == STORED:
+        return read_at(index.fp, data_offset, min(size, entry.compress_size))
+    if entry.compress_type == DEFLATED:
+        raw = read_at(index.fp, data_offset, min(entry.compress_size, COMPRESSED_PROBE_BYTES))
+        try:
+            return zlib.decompressobj(-15).decompress(raw, size)
+        except zlib.error:
+            return b""
+    return b""
+
+
+def native_lib_stats(index):
+    """按 ABI 汇总原生库信息
+
+    返回 {abi: {"count", "compressed", "uncompressed", "stored", "aligned", "aligned_16k",
+    "mismatched", "libs": [...]}}，libs 中每项包含 name、compressed、uncompressed、
+    stored、aligned（4 KiB 页对齐）、aligned_16k、bits、machine。
+    """
+    stats = {}
+    for entry in index:
+        parsed = split_lib_path(entry.name)
+        if parsed is None:
+            continue
+        abi, name = parsed
+        instrument.count("zip.entries_touched")
+        data_offset = index.data_offset(entry)
+        stored = entry.compress_type == STORED
+        bits, machine = parse_elf_header(read_entry_head(index, entry, data_offset))
+        lib = {
+            "name": name,
+            "compressed": entry.compress_size,
+            "uncompressed": entry.file_size,
+            "stored": stored,
+            "aligned": stored and data_offset % PAGE_SIZE == 0,
+            "aligned_16k": stored and data_offset % LARGE_PAGE_SIZE == 0,
+            "bits": bits,
+            "machine": machine,
+        }
+        group = stats.setdefault(abi, {
+            "count": 0, "compressed": 0, "uncompressed": 0, "stored": 0,
+            "aligned": 0, "aligned_16k": 0, "mismatched": 0, "libs": [],
+        })
+        group["count"] += 1
+        group["compressed"] += lib["compressed"]
+        group["uncompressed"] += lib["uncompressed"]
+        group["stored"] += stored
+        group["aligned"] += lib["aligned"]
+        group["aligned_16k"] += lib["aligned_16k"]
+        expected = ABI_MACHINES.get(abi)
+        if expected and machine and machine != expected:
+            group["mismatched"] += 1
+        group["libs"].append(lib)
+
+    for group in stats.values():
+        group["libs"].sort(key=lambda lib: lib["name"])
+    return dict(sorted(stats.items()))
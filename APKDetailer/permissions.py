@@ -0,0 +1,101 @@
+"""Android 权限按保护级别分组
+
+查表数据取自 AOSP frameworks/base/core/res/AndroidManifest.xml（至 Android 14）：
+列出其中的危险权限和普通权限（包括 com.android.* 下的几个平台权限）；表中没有的
+android.permission.* 按 signature / privileged 级别处理，第三方应用通常拿不到；
+不属于平台的权限归为自定义权限。
+"""
+
+PLATFORM_PREFIX = "android.permission."
+
+DANGEROUS = "dangerous"
+SIGNATURE = "signature"
+NORMAL = "normal"
+CUSTOM = "custom"
+
+# 显示顺序和标题
+LEVELS = [
+    (DANGEROUS, "危险权限"),
+    (SIGNATURE, "签名/系统权限"),
+    (NORMAL, "普通权限"),
+    (CUSTOM, "自定义权限"),
+]
+
+
+def _platform(*names):
+    return frozenset(PLATFORM_PREFIX + name for name in names)
+
+
+DANGEROUS_PERMISSIONS = _platform(
+    "READ_CALENDAR", "WRITE_CALENDAR", "CAMERA", "READ_CONTACTS", "WRITE_CONTACTS",
+    "GET_ACCOUNTS", "ACCESS_FINE_LOCATION", "ACCESS_COARSE_LOCATION",
+    "ACCESS_BACKGROUND_LOCATION", "ACCESS_MEDIA_LOCATION", "RECORD_AUDIO",
+    "READ_PHONE_STATE", "READ_PHONE_NUMBERS", "CALL_PHONE", "ANSWER_PHONE_CALLS",
+    "READ_CALL_LOG", "WRITE_CALL_LOG", "USE_SIP", "PROCESS_OUTGOING_CALLS", "ACCEPT_HANDOVER",
+    "BODY_SENSORS", "BODY_SENSORS_BACKGROUND", "ACTIVITY_RECOGNITION",
+    "SEND_SMS", "RECEIVE_SMS", "READ_SMS", "RECEIVE_WAP_PUSH", "RECEIVE_MMS",
+    "READ_EXTERNAL_STORAGE", "WRITE_EXTERNAL_STORAGE",
+    "READ_MEDIA_IMAGES", "READ_MEDIA_VIDEO", "READ_MEDIA_AUDIO", "READ_MEDIA_VISUAL_USER_SELECTED",
+    "BLUETOOTH_SCAN", "BLUETOOTH_ADVERTISE", "BLUETOOTH_CONNECT", "NEARBY_WIFI_DEVICES",
+    "UWB_RANGING", "POST_NOTIFICATIONS",
+) | {"com.android.voicemail.permission.ADD_VOICEMAIL"}
+
+NORMAL_PERMISSIONS = _platform(
+    "ACCESS_LOCATION_EXTRA_COMMANDS", "ACCESS_NETWORK_STATE", "ACCESS_NOTIFICATION_POLICY",
+    "ACCESS_WIFI_STATE", "BLUETOOTH", "BLUETOOTH_ADMIN", "BROADCAST_STICKY",
+    "CALL_COMPANION_APP", "CHANGE_NETWORK_STATE", "CHANGE_WIFI_MULTICAST_STATE",
+    "CHANGE_WIFI_STATE", "CREDENTIAL_MANAGER_QUERY_CANDIDATE_CREDENTIALS",
+    "CREDENTIAL_MANAGER_SET_ALLOWED_PROVIDERS", "CREDENTIAL_MANAGER_SET_ORIGIN",
+    "DELIVER_COMPANION_MESSAGES", "DETECT_SCREEN_CAPTURE", "DISABLE_KEYGUARD",
+    "ENFORCE_UPDATE_OWNERSHIP", "EXPAND_STATUS_BAR", "FLASHLIGHT",
+    "FOREGROUND_SERVICE", "FOREGROUND_SERVICE_CAMERA", "FOREGROUND_SERVICE_CONNECTED_DEVICE",
+    "FOREGROUND_SERVICE_DATA_SYNC", "FOREGROUND_SERVICE_HEALTH", "FOREGROUND_SERVICE_LOCATION",
+    "FOREGROUND_SERVICE_MEDIA_PLAYBACK", "FOREGROUND_SERVICE_MEDIA_PROJECTION",
+    "FOREGROUND_SERVICE_MICROPHONE", "FOREGROUND_SERVICE_PHONE_CALL",
+    "FOREGROUND_SERVICE_REMOTE_MESSAGING", "FOREGROUND_SERVICE_SPECIAL_USE",
+    "FOREGROUND_SERVICE_SYSTEM_EXEMPTED",
+    "GET_PACKAGE_SIZE", "GET_TASKS", "HIDE_OVERLAY_WINDOWS", "HIGH_SAMPLING_RATE_SENSORS",
+    "INTERNET", "KILL_BACKGROUND_PROCESSES", "MANAGE_OWN_CALLS", "MODIFY_AUDIO_SETTINGS",
+    "NFC", "NFC_PREFERRED_PAYMENT_INFO", "NFC_TRANSACTION_EVENT", "PERSISTENT_ACTIVITY",
+    "QUERY_ALL_PACKAGES", "READ_BASIC_PHONE_STATE", "READ_NEARBY_STREAMING_POLICY",
+    "READ_SYNC_SETTINGS", "READ_SYNC_STATS",
+    "RECEIVE_BOOT_COMPLETED", "REORDER_TASKS", "REQUEST_COMPANION_PROFILE_GLASSES",
+    "REQUEST_COMPANION_PROFILE_WATCH", "REQUEST_COMPANION_RUN_IN_BACKGROUND",
+    "REQUEST_COMPANION_START_FOREGROUND_SERVICES_FROM_BACKGROUND",
+    "REQUEST_COMPANION_USE_DATA_IN_BACKGROUND", "REQUEST_DELETE_PACKAGES",
+    "REQUEST_IGNORE_BATTERY_OPTIMIZATIONS", "REQUEST_OBSERVE_COMPANION_DEVICE_PRESENCE",
+    "REQUEST_PASSWORD_COMPLEXITY", "RESTART_PACKAGES", "RUN_USER_INITIATED_JOBS",
+    "SET_WALLPAPER", "SET_WALLPAPER_HINTS", "TRANSMIT_IR",
+    "UPDATE_PACKAGES_WITHOUT_USER_ACTION", "USE_BIOMETRIC", "USE_EXACT_ALARM",
+    "USE_FINGERPRINT", "USE_FULL_SCREEN_INTENT", "VIBRATE", "WAKE_LOCK", "WRITE_SYNC_SETTINGS",
+) | {"com.android.alarm.permission.SET_ALARM",
+     "com.android.launcher.permission.INSTALL_SHORTCUT",
+     "com.android.launcher.permission.UNINSTALL_SHORTCUT"}
+
+# 签名级别中可以由用户在系统设置里单独授予的“特殊权限”
+SPECIAL_ACCESS_PERMISSIONS = _platform(
+    "SYSTEM_ALERT_WINDOW", "WRITE_SETTINGS", "REQUEST_INSTALL_PACKAGES",
+    "MANAGE_EXTERNAL_STORAGE", "PACKAGE_USAGE_STATS", "SCHEDULE_EXACT_ALARM",
+    "ACCESS_NOTIFICATIONS", "BIND_ACCESSIBILITY_SERVICE", "BIND_NOTIFICATION_LISTENER_SERVICE",
+    "BIND_DEVICE_ADMIN", "BIND_VPN_SERVICE", "MANAGE_MEDIA",
+) | {"com.android.voicemail.permission.READ_VOICEMAIL",
+     "com.android.voicemail.permission.WRITE_VOICEMAIL"}
+
+
+def protection_level(name):
+    """返回权限的保护级别：dangerous / signature / normal / custom"""
+    if name in DANGEROUS_PERMISSIONS:
+        return DANGEROUS
+    if name in NORMAL_PERMISSIONS:
+        return NORMAL
+    if name.startswith(PLATFORM_PREFIX) or name.startswith("com.android.voicemail.permission."):
+        return SIGNATURE
+    return CUSTOM
+
+
+def group_permissions(names):
+    """按 LEVELS 的顺序分组，返回 [(级别, 标题, [权限...])]，省略空分组"""
+    groups = {level: [] for level, _ in LEVELS}
+    for name in names:
+        groups[protection_level(name)].append(name)
+    return [(level, title, sorted(groups[level])) for level, title in LEVELS if groups[level]]
@@ -0,0 +1,219 @@
+"""APK 签名证书提取与指纹计算
+
+v2/v3 签名位于中央目录之前的 APK Signing Block 中：从中央目录偏移往前读 24 字节的块尾
+就能确认签名块是否存在，再逐个读取 ID-值 对的 12 字节头部，只取出签名方案对应的值。
+整个过程只有几次定位和几 KiB 的读取，与 APK 大小无关。
+"""
+import hashlib
+import os
+import re
+import struct
+
+from zipindex import read_at
+
+APK_SIG_BLOCK_MAGIC = b"APK Sig Block 42"
+SCHEME_BLOCK_IDS = {
+    0x7109871A: "v2",
+    0xF05368C0: "v3",
+    0x1B93AD61: "v3.1",
+}
+SCHEME_ORDER = ["v1", "v2", "v3", "v3.1", "v4"]
+
+V1_SIGNATURE_RE = re.compile(r"^META-INF/[^/]+\.(RSA|DSA|EC)$", re.IGNORECASE)
+
+
+def _read_tlv(data, pos):
+    """读取一个 DER 编码的 TLV，返回 (标签, 内容起始, 内容结束)"""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        count = length & 0x7F
+        if count == 0 or count > 8:
+            raise ValueError("不支持的 DER 长度编码")
+        length = int.from_bytes(data[pos:pos + count], "big")
+        pos += count
+    end = pos + length
+    if end > len(data):
+        raise ValueError("DER 数据被截断")
+    return tag, pos, end
+
+
+def _children(data, start, end):
+    """产出 [start, end) 范围内的各个子 TLV：(标签, TLV 起始, 内容起始, 内容结束)"""
+    pos = start
+    while pos < end:
+        tag, content_start, content_end = _read_tlv(data, pos)
+        yield tag, pos, content_start, content_end
+        pos = content_end
+
+
+def pkcs7_certificates(data):
+    """从 PKCS#7 SignedData（v1 签名的 .RSA/.DSA/.EC 文件）中取出所有 X.509 证书的 DER 编码"""
+    _, start, end = _read_tlv(data, 0)  # ContentInfo
+    content_info = list(_children(data, start, end))
+    if len(content_info) < 2 or content_info[1][0] != 0xA0:
+        raise ValueError("不是有效的 PKCS#7 数据")
+    _, _, start, end = content_info[1]
+    _, start, end = _read_tlv(data, start)  # SignedData
+    for tag, _, content_start, content_end in _children(data, start, end):
+        if tag == 0xA0:  # [0] IMPLICIT certificates
+            return [data[tlv_start:tlv_end]
+                    for _, tlv_start, _, tlv_end in _children(data, content_start, content_end)]
+    return []
+
+
+def certificate_fingerprints(cert):
+    """计算证书的 SHA-256 / SHA-1 指纹（十六进制，冒号分隔，大写）"""
+    def fmt(digest):
+        return ":".join(f"{b:02X}" for b in digest)
+    return {
+        "sha256": fmt(hashlib.sha256(cert).digest()),
+        "sha1": fmt(hashlib.sha1(cert).digest()),
+    }
+
+
+class _Reader:
+    """按 APK 签名格式读取小端整数和带 uint32 长度前缀的字段"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def remaining(self):
+        return len(self.data) - self.pos
+
+    def u32(self):
+        if self.remaining() < 4:
+            raise ValueError("签名数据被截断")
+        value, = struct.unpack_from("<I", self.data, self.pos)
+        self.pos += 4
+        return value
+
+    def lp(self):
+        length = self.u32()
+        if length > self.remaining():
+            raise ValueError("签名数据长度字段超出范围")
+        value = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return value
+
+    def lp_items(self):
+        """依次读取剩余的全部长度前缀字段"""
+        while self.remaining():
+            yield self.lp()
+
+
+def signing_block_offset(fp, cd_offset):
+    """根据中央目录前 24 字节的块尾返回 APK Signing Block 的起始偏移；没有签名块时返回 None"""
+    if cd_offset < 32:
+        return None
+    block_size, magic = struct.unpack("<Q16s", read_at(fp, cd_offset - 24, 24))
+    if magic != APK_SIG_BLOCK_MAGIC:
+        return None
+    start = cd_offset - block_size - 8
+    if start < 0:
+        raise ValueError("签名块长度超出文件范围")
+    return start
+
+
+def find_signing_block(fp, cd_offset):
+    """定位 APK Signing Block，返回其中各 ID-值 对的 (ID, 值偏移, 值长度)；没有签名块时返回 []"""
+    start = signing_block_offset(fp, cd_offset)
+    if start is None:
+        return []
+    block_size = cd_offset - start - 8
+    if struct.unpack("<Q", read_at(fp, start, 8))[0] != block_size:
+        raise ValueError("签名块头尾记录的长度不一致")
+
+    pairs = []
+    pos = start + 8
+    end = cd_offset - 24
+    while pos + 12 <= end:
+        length, pair_id = struct.unpack("<QI", read_at(fp, pos, 12))
+        if length < 4 or pos + 8 + length > end:
+            raise ValueError("签名块中的 ID-值 对长度无效")
+        pairs.append((pair_id, pos + 12, length - 4))
+        pos += 8 + length
+    return pairs
+
+
+def parse_scheme_signers(value, scheme):
+    """解析 v2/v3 签名方案的值，返回 [(证书 DER 列表, 最小SDK, 最大SDK)]"""
+    signers = []
+    for signer_data in _Reader(_Reader(value).lp()).lp_items():
+        signer = _Reader(signer_data)
+        signed_data = _Reader(signer.lp())
+        signed_data.lp()  # digests
+        certs = list(_Reader(signed_data.lp()).lp_items())
+        min_sdk = max_sdk = None
+        if scheme != "v2":
+            min_sdk = signer.u32()
+            max_sdk = signer.u32()
+        signers.append((certs, min_sdk, max_sdk))
+    return signers
+
+
+def read_v4_certificate(idsig_path):
+    """从 v4 签名文件 (.apk.idsig) 中读取签名证书"""
+    with open(idsig_path, "rb") as f:
+        reader = _Reader(f.read())
+    reader.u32()  # version
+    reader.lp()  # hashing_info
+    signing_info = _Reader(reader.lp())
+    signing_info.lp()  # apk_digest
+    return signing_info.lp()
+
+
+def read_signature_info(fp, cd_offset, v1_blocks=(), apk_path=None):
+    """汇总 APK 的签名信息
+
+    v1_blocks 为 META-INF 下 PKCS#7 签名文件的内容（可为空，跳过 v1）；
+    apk_path 给出时会检查同目录下的 <apk>.idsig 作为 v4 签名。
+    返回 {"schemes": [...], "certificates": [{"sha256", "sha1", "schemes", "min_sdk", "max_sdk"}]}，
+    同一证书出现在多个方案中时只列一次。
+    """
+    certificates = {}
+    schemes = set()
+
+    def add(cert, scheme, min_sdk=None, max_sdk=None):
+        schemes.add(scheme)
+        info = certificates.get(cert)
+        if info is None:
+            info = certificate_fingerprints(cert)
+            info["schemes"] = []
+            info["min_sdk"] = min_sdk
+            info["max_sdk"] = max_sdk
+            certificates[cert] = info
+        if scheme not in info["schemes"]:
+            info["schemes"].append(scheme)
+        if min_sdk is not None and info["min_sdk"] is None:
+            info["min_sdk"] = min_sdk
+            info["max_sdk"] = max_sdk
+
+    for block in v1_blocks:
+        try:
+            certs = pkcs7_certificates(block)
+        except (ValueError, IndexError):
+            continue  # 非 DER 编码（如 BER 不定长）的签名文件无法解析，跳过
+        for cert in certs:
+            add(cert, "v1")
+
+    for pair_id, offset, length in find_signing_block(fp, cd_offset):
+        scheme = SCHEME_BLOCK_IDS.get(pair_id)
+        if scheme is None:
+            continue
+        for certs, min_sdk, max_sdk in parse_scheme_signers(read_at(fp, offset, length), scheme):
+            # 第一个证书是签名者自己的证书，其余是证书链
+            if certs:
+                add(certs[0], scheme, min_sdk, max_sdk)
+
+    if apk_path and os.path.isfile(apk_path + ".idsig"):
+        add(read_v4_certificate(apk_path + ".idsig"), "v4")
+
+    for info in certificates.values():
+        info["schemes"].sort(key=SCHEME_ORDER.index)
+    return {
+        "schemes": sorted(schemes, key=SCHEME_ORDER.index),
+        "certificates": list(certificates.values()),
+    }
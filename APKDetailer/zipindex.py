@@ -0,0 +1,305 @@
+"""ZIP 中央目录索引
+
+只在文件末尾定位一次中央目录并整体读取解析，得到 名称 → 偏移/大小/CRC 的索引，
+之后读取任何条目都只需一次定位，不再需要 zipfile 反复打开和扫描。
+"""
+import struct
+import zlib
+from zipfile import BadZipFile
+
+from common import instrument
+
+EOCD_SIGNATURE = b"PK\x05\x06"
+EOCD64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+EOCD64_SIGNATURE = b"PK\x06\x06"
+CD_SIGNATURE = b"PK\x01\x02"
+LOCAL_SIGNATURE = b"PK\x03\x04"
+
+EOCD_STRUCT = struct.Struct("<4s4H2LH")
+EOCD64_LOCATOR_STRUCT = struct.Struct("<4sLQL")
+EOCD64_STRUCT = struct.Struct("<4sQ2H2L4Q")
+CD_STRUCT = struct.Struct("<4s6H3L5H2L")
+LOCAL_STRUCT = struct.Struct("<4s5H3L2H")
+
+# EOCD 固定 22 字节，后面最多跟 65535 字节的注释；绝大多数 APK 没有注释，
+# 先只读末尾一小段，找不到再扩大到最大范围
+QUICK_EOCD_SEARCH = 4096
+MAX_EOCD_SEARCH = EOCD_STRUCT.size + 0xFFFF
+
+STORED = 0
+DEFLATED = 8
+
+# 流式读取时每次从文件读取/解压的最大字节数，决定了流式读取的内存上限
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ZipEntry:
+    """中央目录中的一个条目"""
+    __slots__ = ("name", "header_offset", "compress_type", "compress_size",
+                 "file_size", "crc", "flag_bits")
+
+    def __init__(self, name, header_offset, compress_type, compress_size,
+                 file_size, crc, flag_bits):
+        self.name = name
+        self.header_offset = header_offset
+        self.compress_type = compress_type
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.crc = crc
+        self.flag_bits = flag_bits
+
+
+def read_at(fp, offset, size):
+    """从 offset 处读取至多 size 字节，计入 zip.bytes_read 计数器"""
+    fp.seek(offset)
+    data = fp.read(size)
+    instrument.count("zip.bytes_read", len(data))
+    return data
+
+
+def locate_central_directory(fp, file_size):
+    """从文件末尾定位中央目录，返回 (中央目录偏移, 中央目录大小, 条目数, EOCD 偏移)"""
+    for window in (QUICK_EOCD_SEARCH, MAX_EOCD_SEARCH):
+        search = min(file_size, window)
+        tail = read_at(fp, file_size - search, search)
+        pos = tail.rfind(EOCD_SIGNATURE)
+        while pos >= 0 and pos + EOCD_STRUCT.size > len(tail):
+            pos = tail.rfind(EOCD_SIGNATURE, 0, pos)
+        if pos >= 0 or search == file_size:
+            break
+    if pos < 0:
+        raise BadZipFile("找不到 ZIP 中央目录结束标记")
+    eocd_offset = file_size - search + pos
+    (_, _, _, _, count, cd_size, cd_offset, _) = EOCD_STRUCT.unpack_from(tail, pos)
+
+    if count == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        # ZIP64：EOCD 前面紧挨着 ZIP64 定位记录
+        locator_offset = eocd_offset - EOCD64_LOCATOR_STRUCT.size
+        if locator_offset >= file_size - search:
+            locator = tail[locator_offset - (file_size - search):pos]
+        else:
+            locator = read_at(fp, locator_offset, EOCD64_LOCATOR_STRUCT.size)
+        sig, _, eocd64_offset, _ = EOCD64_LOCATOR_STRUCT.unpack(locator)
+        if sig != EOCD64_LOCATOR_SIGNATURE:
+            raise BadZipFile("ZIP64 定位记录损坏")
+        record = read_at(fp, eocd64_offset, EOCD64_STRUCT.size)
+        (sig, _, _, _, _, _, _, count, cd_size, cd_offset) = EOCD64_STRUCT.unpack(record)
+        if sig != EOCD64_SIGNATURE:
+            raise BadZipFile("ZIP64 中央目录结束记录损坏")
+
+    if cd_offset + cd_size > eocd_offset:
+        raise BadZipFile("中央目录位置超出文件范围")
+    return cd_offset, cd_size, count, eocd_offset
+
+
+def _apply_zip64_extra(extra, file_size, compress_size, header_offset):
+    """用 ZIP64 扩展字段替换被截断为 0xFFFFFFFF 的数值"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, length = struct.unpack_from("<HH", extra, pos)
+        if tag == 0x0001:
+            values = extra[pos + 4:pos + 4 + length]
+            idx = 0
+
+            def take():
+                nonlocal idx
+                value, = struct.unpack_from("<Q", values, idx)
+                idx += 8
+                return value
+
+            if file_size == 0xFFFFFFFF:
+                file_size = take()
+            if compress_size == 0xFFFFFFFF:
+                compress_size = take()
+            if header_offset == 0xFFFFFFFF:
+                header_offset = take()
+            break
+        pos += 4 + length
+    return file_size, compress_size, header_offset
+
+
+class ZipIndex:
+    """ZIP 文件中央目录的内存索引"""
+
+    def __init__(self, fp, file_size=None):
+        self.fp = fp
+        if file_size is None:
+            fp.seek(0, 2)
+            file_size = fp.tell()
+        self.file_size = file_size
+        with instrument.span("zip.central_directory"):
+            (self.cd_offset, self.cd_size,
+             count, self.eocd_offset) = locate_central_directory(fp, file_size)
+            self._parse(read_at(fp, self.cd_offset, self.cd_size), count)
+
+    def _parse(self, data, count):
+        entries = {}
+        pos = 0
+        end = len(data)
+        while pos + CD_STRUCT.size <= end:
+            (sig, _, _, flag_bits, compress_type, _, _, crc, compress_size,
+             file_size, name_len, extra_len, comment_len, _, _, _,
+             header_offset) = CD_STRUCT.unpack_from(data, pos)
+            if sig != CD_SIGNATURE:
+                break
+            pos += CD_STRUCT.size
+            raw_name = data[pos:pos + name_len]
+            extra = data[pos + name_len:pos + name_len + extra_len]
+            pos += name_len + extra_len + comment_len
+            if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                file_size, compress_size, header_offset = _apply_zip64_extra(
+                    extra, file_size, compress_size, header_offset)
+            name = raw_name.decode("utf-8" if flag_bits & 0x800 else "cp437", "replace")
+            # 与 Android 一致：同名条目以第一个为准
+            if name not in entries:
+                entries[name] = ZipEntry(name, header_offset, compress_type,
+                                         compress_size, file_size, crc, flag_bits)
+        if not entries and count:
+            raise BadZipFile("中央目录为空或已损坏")
+        self.entries = entries
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def names(self):
+        return list(self.entries)
+
+    def data_offset(self, entry):
+        """读取本地文件头，返回条目数据的起始偏移"""
+        instrument.count("zip.local_headers")
+        header = read_at(self.fp, entry.header_offset, LOCAL_STRUCT.size)
+        if len(header) != LOCAL_STRUCT.size or header[:4] != LOCAL_SIGNATURE:
+            raise BadZipFile(f"本地文件头损坏: {entry.name}")
+        name_len, extra_len = struct.unpack_from("<HH", header, 26)
+        return entry.header_offset + LOCAL_STRUCT.size + name_len + extra_len
+
+    def _entry(self, name):
+        entry = name if isinstance(name, ZipEntry) else self.entries.get(name)
+        if entry is None:
+            raise KeyError(name)
+        if entry.flag_bits & 0x1:
+            raise BadZipFile(f"不支持加密条目: {entry.name}")
+        return entry
+
+    def open(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """以流的方式打开条目，只向前读取，缓冲区不超过 chunk_size，见 EntryStream"""
+        entry = self._entry(name)
+        instrument.count("zip.entries_touched")
+        return EntryStream(self.fp, entry, self.data_offset(entry), chunk_size)
+
+    def read(self, name):
+        """读取并解压一个条目的完整内容"""
+        entry = self._entry(name)
+        instrument.count("zip.entries_touched")
+        raw = read_at(self.fp, self.data_offset(entry), entry.compress_size)
+        if entry.compress_type == STORED:
+            data = raw
+        elif entry.compress_type == DEFLATED:
+            data = zlib.decompress(raw, -15)
+        else:
+            raise BadZipFile(f"不支持的压缩方式 {entry.compress_type}: {entry.name}")
+        if zlib.crc32(data) != entry.crc:
+            raise BadZipFile(f"CRC 校验失败: {entry.name}")
+        return data
+
+
+class EntryStream:
+    """条目内容的只进读取流
+
+    未压缩条目直接按偏移读取，skip() 只是移动位置；压缩条目边读边解压，
+    每次最多从文件读取、最多产出 chunk_size 字节，跳过的数据解压后即丢弃。
+    与 ZipIndex 共用同一个文件对象，每次读取前都会重新定位，可以和其他读取交错进行。
+    内容从头到尾都经过解压时，读到末尾会校验 CRC。
+    """
+
+    def __init__(self, fp, entry, data_offset, chunk_size=STREAM_CHUNK_SIZE):
+        if entry.compress_type not in (STORED, DEFLATED):
+            raise BadZipFile(f"不支持的压缩方式 {entry.compress_type}: {entry.name}")
+        self.fp = fp
+        self.entry = entry
+        self.chunk_size = chunk_size
+        self._data_offset = data_offset
+        self._pos = 0
+        if entry.compress_type == DEFLATED:
+            self._raw_pos = data_offset
+            self._raw_left = entry.compress_size
+            self._inflater = zlib.decompressobj(-15)
+            self._buf = b""
+            self._buf_pos = 0
+            self._crc = 0
+
+    @property
+    def size(self):
+        return self.entry.file_size
+
+    def tell(self):
+        return self._pos
+
+    def _fill(self):
+        """再解压出最多 chunk_size 字节到缓冲区，没有更多数据时返回 False"""
+        inflater = self._inflater
+        if inflater.unconsumed_tail:
+            data = inflater.decompress(inflater.unconsumed_tail, self.chunk_size)
+        elif self._raw_left > 0:
+            raw = read_at(self.fp, self._raw_pos, min(self.chunk_size, self._raw_left))
+            if not raw:
+                raise BadZipFile(f"条目数据被截断: {self.entry.name}")
+            self._raw_pos += len(raw)
+            self._raw_left -= len(raw)
+            data = inflater.decompress(raw, self.chunk_size)
+        else:
+            data = inflater.flush()
+        if not data:
+            return False
+        self._crc = zlib.crc32(data, self._crc)
+        self._buf = data
+        self._buf_pos = 0
+        return True
+
+    def _take(self, n, keep):
+        """从压缩流中取出 n 字节；keep 为假时直接丢弃"""
+        parts = []
+        while n > 0:
+            if self._buf_pos >= len(self._buf) and not self._fill():
+                break
+            piece = self._buf[self._buf_pos:self._buf_pos + n]
+            self._buf_pos += len(piece)
+            self._pos += len(piece)
+            n -= len(piece)
+            if keep:
+                parts.append(piece)
+        if self._pos >= self.entry.file_size and self._crc != self.entry.crc:
+            raise BadZipFile(f"CRC 校验失败: {self.entry.name}")
+        return b"".join(parts)
+
+    def read(self, n):
+        """读取最多 n 字节，到达末尾时返回的数据少于 n"""
+        n = max(0, min(n, self.entry.file_size - self._pos))
+        if self.entry.compress_type == DEFLATED:
+            return self._take(n, True)
+        data = read_at(self.fp, self._data_offset + self._pos, n)
+        self._pos += len(data)
+        return data
+
+    def skip(self, n):
+        """向前跳过 n 字节"""
+        n = max(0, min(n, self.entry.file_size - self._pos))
+        if self.entry.compress_type == DEFLATED:
+            self._take(n, False)
+        else:
+            self._pos += n
+
+    def seek_forward(self, pos):
+        """前进到 pos；只能向前，pos 在当前位置之前时抛出 ValueError"""
+        if pos < self._pos:
+            raise ValueError(f"流只能向前读取: {pos} < {self._pos}")
+        self.skip(pos - self._pos)
@@ -9,6 +9,19 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon  # 导入 QIcon
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument, qt_jobs
+from common.scheduler import IO
+
+HASH_ALGORITHMS = {
+    "MD5": hashlib.md5,
+    "SHA1": hashlib.sha1,
+    "SHA256": hashlib.sha256,
+}
+
+CHUNK_SIZE = 1024 * 1024
+PROGRESS_STEP = 64 * CHUNK_SIZE  # 每读 64 MB 上报一次进度
+
 
 def resource_path(relative_path):
     """获取资源路径，兼容打包后的路径"""
@@ -19,6 +32,25 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def calculate_checksum(ctx, file_path, checksum_type):
+    """后台任务：计算文件校验值，定期上报 (已读字节数, 文件大小)，可通过 ctx.token 取消"""
+    hash_func = HASH_ALGORITHMS[checksum_type]()
+    total_size = os.path.getsize(file_path)
+    with instrument.span("crc.checksum", algorithm=checksum_type):
+        done = 0
+        next_report = PROGRESS_STEP
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                ctx.token.raise_if_cancelled()
+                hash_func.update(chunk)
+                done += len(chunk)
+                if done >= next_report:
+                    ctx.report(done, total_size)
+                    next_report += PROGRESS_STEP
+        instrument.count("crc.bytes_read", done)
+    return hash_func.hexdigest()
+
+
 class FileChecksumTool(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -28,6 +60,7 @@ class FileChecksumTool(QMainWindow):
         # 设置窗口图标
         self.setWindowIcon(QIcon(resource_path("icon.ico")))  # 使用 resource_path 函数
 
+        self.check_job = None  # 正在进行的校验任务
         self.init_ui()
 
     def init_ui(self):
@@ -126,26 +159,11 @@ class FileChecksumTool(QMainWindow):
         self.file_label.setText(os.path.basename(file_path))  # 只显示文件名
         self.clear_result()  # 拖拽文件后清除结果
 
-    def calculate_checksum(self, file_path, checksum_type):
-        hash_func = {
-            "MD5": hashlib.md5(),
-            "SHA1": hashlib.sha1(),
-            "SHA256": hashlib.sha256()
-        }.get(checksum_type)
-
-        if not hash_func:
-            return None
-
-        try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_func.update(chunk)
-            return hash_func.hexdigest()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"计算校验值时出错：{e}")
-            return None
-
     def perform_check(self):
+        if self.check_job is not None:
+            # 校验进行中，按钮用作取消
+            self.check_job.cancel()
+            return
         try:
             file_path = getattr(self, "file_path", None)
             if not file_path:
@@ -162,19 +180,47 @@ class FileChecksumTool(QMainWindow):
                     QMessageBox.warning(self, "警告", "无法自动检测校验值类型！")
                     return
 
-            calculated_checksum = self.calculate_checksum(file_path, checksum_type)
-            if calculated_checksum is None:
+            if checksum_type not in HASH_ALGORITHMS:
                 return
 
-            if calculated_checksum.lower() == checksum_input.lower():
-                self.result_label.setText("校验结果：成功")
-                self.result_label.setStyleSheet("color: green")
-            else:
-                self.result_label.setText("校验结果：失败")
-                self.result_label.setStyleSheet("color: red")
+            # 在后台计算，界面保持响应，大文件也可以随时取消
+            job = qt_jobs.QtJob(calculate_checksum, file_path, checksum_type,
+                                parent=self, lane=IO, name="crc.calculate_checksum")
+            job.reported.connect(self.on_check_progress)
+            job.succeeded.connect(lambda checksum: self.on_checksum_ready(checksum, checksum_input))
+            job.failed.connect(self.on_check_failed)
+            job.cancelled.connect(self.clear_result)
+            job.finished.connect(self.on_check_finished)
+            self.check_job = job
+            self.check_button.setText("取消")
+            self.result_label.setText("校验结果：计算中…")
+            self.result_label.setStyleSheet("")
+            job.start()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"校验时出错：{e}")
 
+    def on_check_progress(self, progress):
+        done, total = progress
+        if total:
+            self.result_label.setText(f"校验结果：计算中… {done * 100 // total}%")
+
+    def on_checksum_ready(self, calculated_checksum, checksum_input):
+        if calculated_checksum.lower() == checksum_input.lower():
+            self.result_label.setText("校验结果：成功")
+            self.result_label.setStyleSheet("color: green")
+        else:
+            self.result_label.setText("校验结果：失败")
+            self.result_label.setStyleSheet("color: red")
+
+    def on_check_failed(self, message):
+        self.clear_result()
+        QMessageBox.critical(self, "错误", f"计算校验值时出错：{message}")
+
+    def on_check_finished(self):
+        self.check_job.deleteLater()
+        self.check_job = None
+        self.check_button.setText("校验")
+
     def detect_checksum_type(self, checksum):
         length = len(checksum)
         if length == 32:
@@ -185,6 +231,11 @@ class FileChecksumTool(QMainWindow):
             return "SHA256"
         return None
 
+    def closeEvent(self, event):
+        if self.check_job is not None:
+            self.check_job.cancel()
+        super().closeEvent(event)
+
     def clear_result(self):
         # 清除校验结果
         self.result_label.setText("校验结果：")
@@ -192,6 +243,7 @@ class FileChecksumTool(QMainWindow):
 
 
 if __name__ == "__main__":
+    instrument.setup_from_argv(sys.argv)
     app = QApplication(sys.argv)
     window = FileChecksumTool()
     window.show()
@@ -0,0 +1,225 @@
+"""目录树生成器性能基准
+
+在临时目录中生成不同形状的合成目录树，分别测量扫描、文本渲染、
+带校验值列的单遍遍历（同时生成校验清单）、
+“选择展开的文件夹”对话框构建和 QTextEdit 显示的耗时与峰值内存，
+结果以 JSON 输出，可用 --compare 与之前的结果对比。
+
+示例:
+    python benchmark.py --scale 2 --output run-new.json --compare run-old.json
+    python benchmark.py --shapes deep,hidden --repeat 5
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+import tree_engine
+
+SHAPES = ("wide", "deep", "small_files", "hidden")
+
+
+def _touch_files(path, count, prefix="f", size=0):
+    payload = b"x" * size
+    for i in range(count):
+        with open(os.path.join(path, f"{prefix}{i:05d}.txt"), "wb") as f:
+            f.write(payload)
+
+
+def generate_tree(base, shape, scale=1):
+    """在 base 下生成指定形状的目录树，返回根目录路径"""
+    root = os.path.join(base, shape)
+    os.makedirs(root)
+    if shape == "wide":
+        # 一层里有大量文件夹，每个文件夹若干文件
+        for i in range(500 * scale):
+            path = os.path.join(root, f"dir{i:05d}")
+            os.mkdir(path)
+            _touch_files(path, 20)
+    elif shape == "deep":
+        # 很深的单链目录，每层少量文件
+        path = root
+        for i in range(200 * scale):
+            path = os.path.join(path, f"level{i:04d}")
+            os.mkdir(path)
+            _touch_files(path, 3)
+    elif shape == "small_files":
+        # 较均衡的三层目录，叶子目录里有大量小文件
+        for i in range(10 * scale):
+            for j in range(10):
+                path = os.path.join(root, f"a{i:03d}", f"b{j:03d}")
+                os.makedirs(path)
+                _touch_files(path, 100, size=64)
+    elif shape == "hidden":
+        # 一半条目是隐藏的，测量过滤开销
+        for i in range(200 * scale):
+            for name in (f"dir{i:05d}", f".dir{i:05d}"):
+                path = os.path.join(root, name)
+                os.mkdir(path)
+                _touch_files(path, 10)
+                _touch_files(path, 10, prefix=".f")
+    else:
+        raise ValueError(f"未知的目录形状: {shape}")
+    return root
+
+
+def measure(func, repeat):
+    """多次运行 func 记录耗时，再单独运行一次记录峰值内存（tracemalloc 会拖慢计时）"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_bytes": peak,
+    }
+
+
+def _load_gui():
+    """尽量加载图形界面模块；缺少 Qt 时返回 (None, 原因)"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        import main
+    except ImportError as e:
+        return None, f"无法加载 Qt: {e}"
+    app = main.QApplication.instance() or main.QApplication(sys.argv[:1])
+    window = main.DirectoryTreeGenerator()
+    # 保持 QApplication 的引用，避免被回收
+    window.benchmark_app = app
+    return window, None
+
+
+def run_shape(root, shape, repeat, window, skip_reason):
+    """测量一个目录形状的各个阶段"""
+    results = []
+
+    def record(phase, stats, entries=None, **extra):
+        row = {"shape": shape, "phase": phase}
+        if entries is not None:
+            row["entries"] = entries
+        row.update(stats)
+        row.update(extra)
+        results.append(row)
+
+    entries, stats = measure(lambda: list(tree_engine.iter_entries(root, with_size=True)), repeat)
+    record("scan", stats, len(entries))
+
+    text, stats = measure(
+        lambda: "\n".join(tree_engine.render_lines(root, entries, show_size=True)), repeat)
+    record("render", stats, len(entries), output_bytes=len(text.encode("utf-8")))
+
+    def hash_tree():
+        manifest = io.StringIO()
+        tree_engine.build_tree_text(root, hash_algo="sha256", manifest=manifest)
+        return manifest.getvalue().count("\n")
+
+    hashed, stats = measure(hash_tree, repeat)
+    record("hash", stats, len(entries), files_hashed=hashed)
+
+    if window is None:
+        for phase in ("picker", "text_view"):
+            results.append({"shape": shape, "phase": phase, "skipped": skip_reason})
+        return results
+
+    def build_picker():
+        dialog = window.create_expand_dialog(root)
+        dialog.deleteLater()
+        return len(window.folder_checkboxes_list)
+
+    folders, stats = measure(build_picker, repeat)
+    record("picker", stats, folders)
+
+    def show_text():
+        window.result_text.setPlainText(text)
+        window.result_text.document().size()  # 触发排版
+        return len(text)
+
+    _, stats = measure(show_text, repeat)
+    record("text_view", stats, len(entries))
+    return results
+
+
+def compare(old_results, new_results):
+    """产出新旧两次结果的对比行"""
+    old_index = {(r["shape"], r["phase"]): r for r in old_results if "median" in r}
+    for row in new_results:
+        old = old_index.get((row["shape"], row["phase"]))
+        if old is None or "median" not in row:
+            continue
+        ratio = row["median"] / old["median"] if old["median"] else float("inf")
+        yield (f"{row['shape']:<12} {row['phase']:<10} "
+               f"{old['median'] * 1000:10.2f} ms → {row['median'] * 1000:10.2f} ms "
+               f"({ratio:5.2f}x)  峰值内存 {old['peak_bytes'] // 1024} KiB → "
+               f"{row['peak_bytes'] // 1024} KiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="目录树生成器性能基准")
+    parser.add_argument("--shapes", default=",".join(SHAPES),
+                        help=f"要测试的目录形状，逗号分隔（可选: {', '.join(SHAPES)}）")
+    parser.add_argument("--scale", type=int, default=1, help="目录规模倍数（默认 1）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数（默认 3）")
+    parser.add_argument("--no-gui", action="store_true", help="不测量依赖 Qt 的阶段")
+    parser.add_argument("--output", metavar="FILE", help="结果写入 FILE（默认输出到标准输出）")
+    parser.add_argument("--compare", metavar="FILE", help="与之前保存的结果对比")
+    args = parser.parse_args(argv)
+
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error(f"未知的目录形状: {shape}")
+
+    window, skip_reason = (None, "已指定 --no-gui") if args.no_gui else _load_gui()
+
+    results = []
+    base = tempfile.mkdtemp(prefix="foldertree-bench-")
+    try:
+        for shape in shapes:
+            root = generate_tree(base, shape, args.scale)
+            results.extend(run_shape(root, shape, args.repeat, window, skip_reason))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old_report = json.load(f)
+        for line in compare(old_report["results"], results):
+            print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""目录树中的文件校验值列与 sha256sum 兼容的校验清单
+
+遍历与哈希计算同时进行：遍历产出的条目依次放入一个有上限的窗口，
+文件交给线程池计算校验值（hashlib 计算时会释放 GIL），窗口最前面的条目算完后
+按原顺序交给下游渲染。这样只需遍历一次目录，内存占用也只与窗口大小有关。
+
+校验清单每行为 "<校验值>  <相对路径>"，可直接用 sha256sum -c（或 md5sum -c 等）检查。
+"""
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from common.scheduler import DEFAULT_LANES, IO
+from snapshot import DEFAULT_HASH, file_digest
+
+# 图形界面中可选的算法
+ALGORITHMS = ("md5", "sha1", "sha256", "sha512", "blake2b")
+# 默认线程数与调度器 io 通道相同，避免多个线程同时读同一块磁盘
+DEFAULT_WORKERS = DEFAULT_LANES[IO]
+WINDOW_PER_WORKER = 4  # 每个线程最多预先排队的文件数
+DIGEST_UNAVAILABLE = "[无法读取]"
+
+
+def check_algorithm(algo):
+    """确认算法可用且输出定长校验值，否则抛出 ValueError"""
+    try:
+        hashlib.new(algo).hexdigest()
+    except (ValueError, TypeError):  # TypeError: shake_* 需要指定长度
+        raise ValueError(f"不支持的校验算法: {algo}")
+
+
+def _resolve(entry, future):
+    if future is not None:
+        try:
+            entry.digest = future.result()
+        except OSError:
+            entry.digest = None
+    return entry
+
+
+def iter_hashed_entries(entries, algo=DEFAULT_HASH, workers=None):
+    """给条目序列中的文件填上 digest（读取失败时为 None），按原顺序产出"""
+    check_algorithm(algo)
+    workers = workers or DEFAULT_WORKERS
+    window = deque()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for entry in entries:
+            future = None
+            if not entry.is_dir and not entry.error:
+                future = pool.submit(file_digest, entry.path, algo)
+            window.append((entry, future))
+            if len(window) > workers * WINDOW_PER_WORKER:
+                yield _resolve(*window.popleft())
+        while window:
+            yield _resolve(*window.popleft())
+    finally:
+        # 下游提前停止（取消、管道关闭）时丢弃还没开始的计算
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def format_digest(entry):
+    """目录树行尾的校验值列"""
+    if entry.is_dir or entry.error:
+        return ""
+    return f"  {entry.digest or DIGEST_UNAVAILABLE}"
+
+
+def manifest_line(digest, rel_path):
+    """按 sha256sum 的格式生成一行；路径含反斜杠或换行时按 GNU coreutils 的规则转义"""
+    if "\\" in rel_path or "\n" in rel_path:
+        rel_path = rel_path.replace("\\", "\\\\").replace("\n", "\\n")
+        return f"\\{digest}  {rel_path}"
+    return f"{digest}  {rel_path}"
+
+
+def tee_manifest(entries, root, out):
+    """原样转发条目，同时把已算出校验值的文件写入校验清单 out（文本文件对象）"""
+    for entry in entries:
+        if entry.digest:
+            rel_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+            out.write(manifest_line(entry.digest, rel_path))
+            out.write("\n")
+        yield entry
@@ -0,0 +1,209 @@
+"""重复文件查找：按大小分组 → 比较首尾部分哈希 → 比较完整哈希
+
+每一步只处理上一步仍然“撞车”的文件，大多数文件只需要一次 stat，
+根本不会被读取。哈希计算在线程池中并行进行（hashlib 计算时会释放 GIL）。
+"""
+import hashlib
+import os
+import stat
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import tree_engine
+from common.formatting import format_size
+from common.scheduler import DEFAULT_LANES, IO
+
+PARTIAL_BYTES = 4 * 1024
+CHUNK_SIZE = 1024 * 1024
+CANCEL_CHECK_ENTRIES = 1024  # 遍历时每产出这么多条目检查一次取消
+# 默认线程数与调度器 io 通道相同：图形界面中查找重复文件本身就是 io 通道的任务，不能再额外抢磁盘
+DEFAULT_WORKERS = DEFAULT_LANES[IO]
+
+
+class DuplicateGroup:
+    """一组内容完全相同的文件"""
+    __slots__ = ("size", "digest", "paths")
+
+    def __init__(self, size, digest, paths):
+        self.size = size
+        self.digest = digest
+        self.paths = paths
+
+    @property
+    def wasted(self):
+        """删除多余副本后可节省的字节数"""
+        return self.size * (len(self.paths) - 1)
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def partial_digest(path, size):
+    """只读取文件开头和结尾各 PARTIAL_BYTES 字节计算哈希"""
+    h = _new_hash()
+    with open(path, "rb") as f:
+        if size <= 2 * PARTIAL_BYTES:
+            h.update(f.read())
+        else:
+            h.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_BYTES))
+    return h.hexdigest()
+
+
+def full_digest(path):
+    """读取整个文件计算哈希"""
+    h = _new_hash()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _unique_inodes(paths):
+    """去掉符号链接和指向同一文件的硬链接，它们不占用额外空间，不算重复"""
+    seen = set()
+    result = []
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        if stat.S_ISLNK(st.st_mode):
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return result
+
+
+def _rehash(pool, groups, digest_func, token=None):
+    """对每组候选文件重新计算哈希，按 (大小, 哈希) 重新分组，只保留仍有冲突的组"""
+    jobs = [(size, path, pool.submit(digest_func, path, size))
+            for size, paths in groups for path in paths]
+    buckets = defaultdict(list)
+    for size, path, future in jobs:
+        if token is not None:
+            token.raise_if_cancelled()
+        try:
+            digest = future.result()
+        except OSError:
+            continue
+        buckets[(size, digest)].append(path)
+    return [(key, paths) for key, paths in buckets.items() if len(paths) > 1]
+
+
+def find_duplicates(files, workers=None, min_size=1, token=None):
+    """在 (路径, 大小) 序列中查找内容重复的文件，返回按浪费空间降序排列的 DuplicateGroup 列表
+
+    workers 默认为 DEFAULT_WORKERS。token 为 scheduler.CancelToken 时，每取得一个哈希结果检查一次取消，
+    取消后丢弃尚未开始的计算。
+    """
+    by_size = defaultdict(list)
+    for path, size in files:
+        if size is not None and size >= min_size:
+            by_size[size].append(path)
+
+    candidates = []
+    for size, paths in by_size.items():
+        if len(paths) > 1:
+            paths = _unique_inodes(paths)
+            if len(paths) > 1:
+                candidates.append((size, paths))
+    if not candidates:
+        return []
+
+    groups = []
+    pool = ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS)
+    try:
+        partial = _rehash(pool, candidates, partial_digest, token)
+        # 小文件的“部分哈希”已经覆盖了全部内容，无需再读一遍
+        pending = []
+        for (size, digest), paths in partial:
+            if size <= 2 * PARTIAL_BYTES:
+                groups.append(DuplicateGroup(size, digest, sorted(paths)))
+            else:
+                pending.append((size, paths))
+        for (size, digest), paths in _rehash(pool, pending, lambda p, _s: full_digest(p), token):
+            groups.append(DuplicateGroup(size, digest, sorted(paths)))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    groups.sort(key=lambda g: (-g.wasted, g.paths[0]))
+    return groups
+
+
+def group_index(groups):
+    """生成 路径 → 组编号（从 1 开始）的映射"""
+    return {path: number for number, group in enumerate(groups, 1) for path in group.paths}
+
+
+def iter_summary_lines(root, groups):
+    """产出重复文件汇总文本"""
+    if not groups:
+        yield "未发现重复文件"
+        return
+    total_files = sum(len(g.paths) for g in groups)
+    total_wasted = sum(g.wasted for g in groups)
+    yield (f"重复文件: {len(groups)} 组, {total_files} 个文件, "
+           f"可节省 {format_size(total_wasted)}")
+    for number, group in enumerate(groups, 1):
+        yield f"[重复 #{number}] {format_size(group.size)} × {len(group.paths)}"
+        for path in group.paths:
+            yield "    " + os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def scan_with_duplicates(root, ignore_hidden=True, expand=None, max_depth=None, workers=None,
+                         token=None):
+    """遍历一次目录树，返回 (条目列表, 重复文件组)；token 用法见 find_duplicates"""
+    entries = []
+    for entry in tree_engine.iter_entries(root, ignore_hidden, True, expand, max_depth, with_size=True):
+        if token is not None and len(entries) % CANCEL_CHECK_ENTRIES == 0:
+            token.raise_if_cancelled()
+        entries.append(entry)
+    files = ((e.path, e.size) for e in entries if not e.is_dir and not e.error)
+    return entries, find_duplicates(files, workers, token=token)
+
+
+def iter_duplicate_tree_lines(root, ignore_hidden=True, show_size=False, expand=None,
+                              max_depth=None, workers=None, token=None):
+    """产出带重复标注的目录树文本，末尾附加重复文件汇总"""
+    if ignore_hidden and os.path.basename(root).startswith('.'):
+        return
+    entries, groups = scan_with_duplicates(root, ignore_hidden, expand, max_depth, workers, token)
+    index = group_index(groups)
+
+    def annotate(entry):
+        number = index.get(entry.path)
+        return f"  [重复 #{number}]" if number else ""
+
+    yield from tree_engine.render_lines(root, entries, show_size, annotate)
+    yield ""
+    yield from iter_summary_lines(root, groups)
+
+
+def build_duplicate_tree_dict(root, ignore_hidden=True, show_size=False, expand=None,
+                              max_depth=None, workers=None):
+    """生成带重复标注的字典形式目录树，重复组列在根节点的 duplicates 字段中"""
+    if ignore_hidden and os.path.basename(root).startswith('.'):
+        return None
+    entries, groups = scan_with_duplicates(root, ignore_hidden, expand, max_depth, workers)
+    index = group_index(groups)
+
+    def extra(entry):
+        number = index.get(entry.path)
+        return {"duplicate_group": number} if number else None
+
+    tree = tree_engine.tree_to_dict(root, entries, show_size, extra)
+    tree["duplicates"] = [
+        {
+            "group": number,
+            "size": group.size,
+            "digest": group.digest,
+            "paths": [os.path.relpath(p, root).replace(os.sep, "/") for p in group.paths],
+        }
+        for number, group in enumerate(groups, 1)
+    ]
+    return tree
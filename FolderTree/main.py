@@ -1,13 +1,65 @@
+import io
 import os
 import sys
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
                              QWidget, QLabel, QLineEdit, QPushButton, QTextEdit,
-                             QFileDialog, QCheckBox, QMessageBox)
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QDialog, QScrollArea, QDialogButtonBox
-from PyQt5.QtGui import QIcon
+                             QFileDialog, QCheckBox, QMessageBox, QComboBox)
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QDialog, QScrollArea, QDialogButtonBox
+from PyQt6.QtGui import QIcon
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument, qt_jobs
+from common.scheduler import IO
+import checksums
+import duplicates
+import tree_engine
+
+CANCEL_CHECK_LINES = 1024  # 后台生成时每输出这么多行检查一次取消
+
+
+def generate_tree_text(ctx, dir_path, ignore_hidden, show_files, show_size, find_duplicates, expand,
+                       hash_algo=None):
+    """后台任务：生成目录树文本，可通过 ctx.token 取消
+
+    返回 (目录树文本, 校验清单文本)；未指定 hash_algo 时校验清单为 None。
+    """
+    manifest = io.StringIO() if hash_algo else None
+    with instrument.span("tree.generate", duplicates=find_duplicates, size=show_size, hash=hash_algo):
+        if find_duplicates:
+            lines = duplicates.iter_duplicate_tree_lines(
+                dir_path,
+                ignore_hidden=ignore_hidden,
+                show_size=show_size,
+                expand=expand,
+                token=ctx.token
+            )
+        else:
+            lines = tree_engine.iter_tree_lines(
+                dir_path,
+                ignore_hidden=ignore_hidden,
+                show_files=show_files,
+                show_size=show_size,
+                expand=expand,
+                hash_algo=hash_algo,
+                manifest=manifest
+            )
+        # 计算校验值时每行都可能要等待读文件，逐行检查取消
+        step = 1 if hash_algo else CANCEL_CHECK_LINES
+        parts = []
+        try:
+            for i, line in enumerate(lines):
+                if i % step == 0:
+                    ctx.token.raise_if_cancelled()
+                parts.append(line)
+                parts.append("\n")
+        finally:
+            # 取消时立即关闭生成器，丢弃线程池里尚未开始的哈希计算
+            lines.close()
+        return "".join(parts), manifest.getvalue() if manifest is not None else None
+
+
 # 在类定义中添加初始化变量
 class DirectoryTreeGenerator(QMainWindow):
     def __init__(self):
@@ -17,6 +69,10 @@ class DirectoryTreeGenerator(QMainWindow):
         self.setGeometry(100, 100, 800, 600)
         self.selected_folders = set()  # 使用集合存储选中的文件夹
         self.current_dir_path = ""  # 添加当前目录路径变量
+        self.generate_job = None  # 正在进行的生成任务
+        self.generate_hash_algo = None  # 正在进行的生成任务使用的校验算法
+        self.manifest_text = None  # 最近一次生成的校验清单
+        self.manifest_algo = None
         self.init_ui()
 
     def resource_path(self, relative_path):
@@ -24,7 +80,7 @@ class DirectoryTreeGenerator(QMainWindow):
         try:
             base_path = sys._MEIPASS
         except Exception:
-            base_path = os.path.abspath(".")
+            base_path = os.path.dirname(os.path.abspath(__file__))
 
         return os.path.join(base_path, relative_path)
 
@@ -139,9 +195,21 @@ class DirectoryTreeGenerator(QMainWindow):
         self.show_size_check.setChecked(False)
         options_layout.addWidget(self.show_size_check)
 
+        self.find_duplicates_check = QCheckBox("查找重复文件")
+        self.find_duplicates_check.setChecked(False)
+        options_layout.addWidget(self.find_duplicates_check)
+
+        # 校验值列：遍历的同时在后台线程中计算
+        self.hash_combo = QComboBox()
+        self.hash_combo.addItem("不计算校验值", None)
+        for algo in checksums.ALGORITHMS:
+            self.hash_combo.addItem(algo.upper(), algo)
+        self.hash_combo.setToolTip("在每个文件后附加校验值，并可保存为 sha256sum 格式的校验清单")
+        options_layout.addWidget(self.hash_combo)
+
         # 连接信号槽并初始化状态
         self.show_files_check.stateChanged.connect(self.toggle_show_size_enabled)
-        self.toggle_show_size_enabled(Qt.Checked)  # 手动触发一次以初始化状态
+        self.toggle_show_size_enabled(Qt.CheckState.Checked)  # 手动触发一次以初始化状态
 
         # 新增: 展开控制按钮
         self.expand_control_button = QPushButton("选择展开的文件夹...")
@@ -180,6 +248,12 @@ class DirectoryTreeGenerator(QMainWindow):
         self.save_button = QPushButton("保存到文件")
         self.save_button.clicked.connect(self.save_to_file)
         button_layout.addWidget(self.save_button)
+
+        self.save_manifest_button = QPushButton("保存校验清单")
+        self.save_manifest_button.setToolTip("保存为 sha256sum 格式，在目标目录中可用 sha256sum -c 检查")
+        self.save_manifest_button.setEnabled(False)
+        self.save_manifest_button.clicked.connect(self.save_manifest)
+        button_layout.addWidget(self.save_manifest_button)
         
         self.clear_button = QPushButton("清空")
         self.clear_button.clicked.connect(self.clear_results)
@@ -191,10 +265,15 @@ class DirectoryTreeGenerator(QMainWindow):
             self.dir_input.setText(dir_path)
     
     def toggle_show_size_enabled(self, state):
-        """根据'包含文件'选项状态切换'显示文件大小'的可用状态"""
-        self.show_size_check.setEnabled(state == Qt.Checked)
-        if state != Qt.Checked:
-            self.show_size_check.setChecked(False)
+        """根据'包含文件'选项状态切换'显示文件大小'和'查找重复文件'的可用状态"""
+        checked = Qt.CheckState(state) == Qt.CheckState.Checked  # PyQt6 的 stateChanged 传入的是整数
+        for check in (self.show_size_check, self.find_duplicates_check):
+            check.setEnabled(checked)
+            if not checked:
+                check.setChecked(False)
+        self.hash_combo.setEnabled(checked)
+        if not checked:
+            self.hash_combo.setCurrentIndex(0)
 
     def generate_tree(self):
         dir_path = self.dir_input.text().strip()
@@ -209,24 +288,64 @@ class DirectoryTreeGenerator(QMainWindow):
         ignore_hidden = self.ignore_hidden_check.isChecked()
         show_files = self.show_files_check.isChecked()
         show_size = show_files and self.show_size_check.isChecked()  # 只有当包含文件时才考虑显示大小
+        find_duplicates = show_files and self.find_duplicates_check.isChecked()
+        hash_algo = self.hash_combo.currentData() if show_files else None
+        if find_duplicates and hash_algo:
+            QMessageBox.warning(self, "警告", "查找重复文件时不能同时计算校验值列!")
+            return
         
-        try:
-            tree = self.build_directory_tree(
-                dir_path, 
-                ignore_hidden=ignore_hidden,
-                show_files=show_files,
-                show_size=show_size
-            )
+        # 新的生成请求取代尚未完成的旧请求
+        self.cancel_generate()
+        job = qt_jobs.QtJob(
+            generate_tree_text, dir_path, ignore_hidden, show_files, show_size, find_duplicates,
+            frozenset(self.selected_folders).__contains__, hash_algo,
+            parent=self, lane=IO, name="tree.generate_tree"
+        )
+        job.succeeded.connect(self.on_tree_ready)
+        job.failed.connect(self.on_tree_failed)
+        job.finished.connect(job.deleteLater)
+        self.generate_job = job
+        self.generate_hash_algo = hash_algo
+        self.generate_button.setText("生成中...")
+        job.start()
+
+    def cancel_generate(self):
+        if self.generate_job is not None:
+            self.generate_job.cancel()
+            self.generate_job = None
+            self.generate_button.setText("生成目录树")
+
+    def on_tree_ready(self, result):
+        if self.sender() is not self.generate_job:
+            return  # 已被新的请求取代
+        self.generate_job = None
+        self.generate_button.setText("生成目录树")
+        tree, self.manifest_text = result
+        self.manifest_algo = self.generate_hash_algo
+        self.save_manifest_button.setEnabled(self.manifest_text is not None)
+        with instrument.span("tree.set_text", lines=tree.count("\n")):
             self.result_text.setPlainText(tree)
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"生成目录树时出错:\n{str(e)}")
-    
+
+    def on_tree_failed(self, message):
+        if self.sender() is not self.generate_job:
+            return
+        self.generate_job = None
+        self.generate_button.setText("生成目录树")
+        QMessageBox.critical(self, "错误", f"生成目录树时出错:\n{message}")
+
     def show_expand_dialog(self):
         dir_path = self.dir_input.text().strip()
         if not dir_path or not os.path.isdir(dir_path):
             QMessageBox.warning(self, "警告", "请先选择有效的目录路径!")
             return
         
+        with instrument.span("tree.expand_dialog.build"):
+            dialog = self.create_expand_dialog(dir_path)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.selected_folders = {cb.full_path for cb in self.folder_checkboxes_list if cb.isChecked()}
+
+    def create_expand_dialog(self, dir_path):
+        """创建选择展开文件夹的对话框（不显示），便于单独测量构建耗时"""
         dialog = QDialog(self)
         dialog.setWindowTitle("选择要展开的文件夹")
         dialog.resize(600, 500)
@@ -297,12 +416,14 @@ class DirectoryTreeGenerator(QMainWindow):
         self.folder_children = defaultdict(list)
         
         # 先收集所有文件夹并建立父子关系
-        for root, dirs, _ in os.walk(dir_path):
-            current_path = root
-            for d in dirs:
-                full_path = os.path.join(root, d)
-                self.folder_parents[full_path] = current_path
-                self.folder_children[current_path].append(full_path)
+        with instrument.span("tree.expand_dialog.walk"):
+            for root, dirs, _ in os.walk(dir_path):
+                current_path = root
+                instrument.count("tree.expand_dialog.dirs", len(dirs))
+                for d in dirs:
+                    full_path = os.path.join(root, d)
+                    self.folder_parents[full_path] = current_path
+                    self.folder_children[current_path].append(full_path)
         
         # 修改这里 - 将folder_checkboxes改为存储所有复选框的列表
         self.folder_checkboxes_list = []  # 新增列表存储所有复选框
@@ -331,15 +452,13 @@ class DirectoryTreeGenerator(QMainWindow):
         layout.addWidget(self.scroll)
         
         # 确定/取消按钮
-        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         button_box.accepted.connect(dialog.accept)
         button_box.rejected.connect(dialog.reject)
         layout.addWidget(button_box)
         
         dialog.setLayout(layout)
-        
-        if dialog.exec_() == QDialog.Accepted:
-            self.selected_folders = {cb.full_path for cb in self.folder_checkboxes_list if cb.isChecked()}
+        return dialog
 
     def filter_folders(self):
         """根据搜索文本过滤文件夹"""
@@ -369,89 +488,6 @@ class DirectoryTreeGenerator(QMainWindow):
                         self.folder_checkboxes[child].setChecked(False)
                         queue.append(child)
 
-    def build_directory_tree(self, path, prefix="", ignore_hidden=True, show_files=True, show_size=False):
-        """递归构建目录树"""
-        if ignore_hidden and os.path.basename(path).startswith('.'):
-            return ""
-        
-        name = os.path.basename(path)
-        if not prefix:  # 根目录
-            tree = f"{name}/\n"
-        else:
-            tree = ""  # 非根目录不重复显示名称
-        
-        try:
-            entries = sorted(os.listdir(path))
-        except PermissionError:
-            return tree + f"{prefix}  [权限被拒绝]\n"
-        
-        files = []
-        dirs = []
-        
-        for entry in entries:
-            full_path = os.path.join(path, entry)
-            if ignore_hidden and entry.startswith('.'):
-                continue
-            if os.path.isdir(full_path):
-                dirs.append(entry)
-            elif show_files:
-                files.append(entry)
-        
-        # 处理子目录
-        for i, entry in enumerate(dirs):
-            full_path = os.path.join(path, entry)
-            if hasattr(self, 'selected_folders') and full_path not in self.selected_folders:
-                # 如果文件夹不在选中列表中，只显示名称不展开
-                if i == len(dirs) - 1 and not files:
-                    tree += f"{prefix}└── {entry}/\n"
-                else:
-                    tree += f"{prefix}├── {entry}/\n"
-                continue
-            
-            # 计算正确的缩进前缀
-            if i == len(dirs) - 1 and not files:
-                connector = "└── "
-                new_prefix = prefix + "    "
-            else:
-                connector = "├── "
-                new_prefix = prefix + "│   "
-            
-            # 添加当前目录连接线
-            tree += f"{prefix}{connector}{entry}/\n"
-            
-            # 递归构建子树
-            subtree = self.build_directory_tree(
-                full_path, new_prefix, ignore_hidden, show_files, show_size
-            )
-            tree += subtree
-        
-        # 处理文件
-        for i, entry in enumerate(files):
-            full_path = os.path.join(path, entry)
-            if i == len(files) - 1 and (i > 0 or len(dirs) > 0):
-                tree += f"{prefix}└── {entry}"
-            else:
-                tree += f"{prefix}├── {entry}"
-            
-            if show_size:
-                try:
-                    size = os.path.getsize(full_path)
-                    tree += f" ({self.format_size(size)})"
-                except OSError:
-                    tree += " (无法获取大小)"
-            
-            tree += "\n"
-        
-        return tree
-    
-    def format_size(self, size):
-        """格式化文件大小"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
-    
     def copy_to_clipboard(self):
         text = self.result_text.toPlainText()
         if text:
@@ -479,12 +515,38 @@ class DirectoryTreeGenerator(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"保存文件时出错:\n{str(e)}")
     
+    def save_manifest(self):
+        if self.manifest_text is None:
+            QMessageBox.warning(self, "警告", "请先选择校验算法并生成目录树!")
+            return
+
+        # 默认保存到目标目录，文件名与 sha256sum 等工具的惯例一致
+        default_path = os.path.join(self.dir_input.text().strip(), f"{self.manifest_algo.upper()}SUMS")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存校验清单", default_path, "所有文件 (*)"
+        )
+
+        if file_path:
+            try:
+                with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+                    f.write(self.manifest_text)
+                QMessageBox.information(self, "成功", "校验清单已保存到文件!")
+            except Exception as e:
+                QMessageBox.critical(self, "错误", f"保存文件时出错:\n{str(e)}")
+
     def clear_results(self):
         self.result_text.clear()
+        self.manifest_text = None
+        self.save_manifest_button.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.cancel_generate()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
+    instrument.setup_from_argv(sys.argv)
     app = QApplication(sys.argv)
     window = DirectoryTreeGenerator()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec())
\ No newline at end of file
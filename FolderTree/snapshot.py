@@ -0,0 +1,282 @@
+"""目录快照与差异比较
+
+快照是按路径分量排序的条目流（先父目录、后子项，同级按名称排序），
+保存为一行一条的 JSON（文件名以 .gz 结尾时自动压缩）。两份快照或目录
+只需同步向前归并一遍即可得出差异，内存占用只与变化条目的数量有关。
+"""
+import gzip
+import hashlib
+import json
+import os
+
+from common import instrument
+from common.formatting import format_size
+
+SNAPSHOT_FORMAT = "foldertree-snapshot"
+SNAPSHOT_VERSION = 1
+DEFAULT_HASH = "sha256"
+CHUNK_SIZE = 1024 * 1024
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+MARKERS = {ADDED: "[+]", REMOVED: "[-]", MODIFIED: "[*]"}
+
+
+class Record:
+    """快照中的一个条目；path 为实际文件路径（从快照文件读取时为 None）"""
+    __slots__ = ("parts", "is_dir", "size", "mtime_ns", "digest", "path")
+
+    def __init__(self, parts, is_dir, size, mtime_ns, digest=None, path=None):
+        self.parts = parts
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.path = path
+
+
+def file_digest(path, algo=DEFAULT_HASH):
+    """计算文件的校验值"""
+    h = hashlib.new(algo)
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+            size += len(chunk)
+    instrument.count("tree.hashed_files")
+    instrument.count("tree.hashed_bytes", size)
+    return h.hexdigest()
+
+
+def iter_records(root, ignore_hidden=True, hash_algo=None):
+    """遍历目录，按快照顺序产出 Record（不包含根目录本身，不跟随符号链接）"""
+    def listing(path):
+        try:
+            with os.scandir(path) as it:
+                return iter(sorted(it, key=lambda e: e.name))
+        except OSError:
+            return iter(())
+
+    stack = [((), listing(root))]
+    while stack:
+        parent, it = stack[-1]
+        item = next(it, None)
+        if item is None:
+            stack.pop()
+            continue
+        if ignore_hidden and item.name.startswith('.'):
+            continue
+        try:
+            st = item.stat(follow_symlinks=False)
+            is_dir = item.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        parts = parent + (item.name,)
+        record = Record(parts, is_dir, 0 if is_dir else st.st_size, st.st_mtime_ns,
+                        path=item.path)
+        if hash_algo and not is_dir:
+            try:
+                record.digest = file_digest(item.path, hash_algo)
+            except OSError:
+                pass
+        yield record
+        if is_dir:
+            stack.append((parts, listing(item.path)))
+
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def save_snapshot(root, out_path, ignore_hidden=True, hash_algo=None):
+    """把目录快照写入文件，返回写入的条目数"""
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "root": os.path.abspath(root),
+        "hash": hash_algo,
+    }
+    count = 0
+    with _open_text(out_path, "w") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for r in iter_records(root, ignore_hidden, hash_algo):
+            row = ["/".join(r.parts), "d" if r.is_dir else "f", r.size, r.mtime_ns, r.digest]
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def is_snapshot_file(path):
+    """判断路径是否为快照文件"""
+    if not os.path.isfile(path):
+        return False
+    try:
+        with _open_text(path, "r") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError, UnicodeDecodeError):
+        return False
+    return isinstance(header, dict) and header.get("format") == SNAPSHOT_FORMAT
+
+
+class Snapshot:
+    """已保存的快照，可多次迭代，每次都从文件流式读取"""
+
+    def __init__(self, path):
+        self.path = path
+        with _open_text(path, "r") as f:
+            header = json.loads(f.readline())
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"不是有效的快照文件: {path}")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的快照版本: {header.get('version')}")
+        self.root = header.get("root") or path
+        self.hash_algo = header.get("hash")
+
+    def __iter__(self):
+        with _open_text(self.path, "r") as f:
+            f.readline()
+            for line in f:
+                path, kind, size, mtime_ns, digest = json.loads(line)
+                yield Record(tuple(path.split("/")), kind == "d", size, mtime_ns, digest)
+
+
+class _Cursor:
+    """可预读一个元素的迭代器，同时检查输入是否按快照顺序排列"""
+
+    def __init__(self, records, label):
+        self._it = iter(records)
+        self._label = label
+        self.current = None
+        self.advance()
+
+    def advance(self):
+        previous = self.current
+        self.current = next(self._it, None)
+        if previous is not None and self.current is not None \
+                and not previous.parts < self.current.parts:
+            raise ValueError(f"{self._label} 中的条目未按顺序排列: {'/'.join(self.current.parts)}")
+
+    def step(self):
+        """前进到下一个条目；当前条目是目录时连同其所有后代一起跳过"""
+        record = self.current
+        self.advance()
+        if record.is_dir:
+            depth = len(record.parts)
+            while self.current is not None and self.current.parts[:depth] == record.parts:
+                self.advance()
+
+
+def _digest_of(record, algo):
+    if record.digest is None and record.path is not None:
+        try:
+            record.digest = file_digest(record.path, algo)
+        except OSError:
+            pass
+    return record.digest
+
+
+def _is_modified(old, new, compare_hash, hash_algo):
+    if old.size != new.size:
+        return True
+    if compare_hash:
+        old_digest = _digest_of(old, hash_algo)
+        new_digest = _digest_of(new, hash_algo)
+        if old_digest is not None and new_digest is not None:
+            return old_digest != new_digest
+    return old.mtime_ns != new.mtime_ns
+
+
+def diff_records(old_records, new_records, compare_hash=False, hash_algo=DEFAULT_HASH):
+    """同步归并两个有序条目流，产出 (状态, 旧条目, 新条目)
+
+    新增/删除的目录只报告目录本身，不再逐个列出其中的内容；
+    类型变化（文件 ↔ 目录）视为先删除后新增。
+    比较文件时先看大小，compare_hash 为真时再比较校验值（按需计算），
+    否则比较修改时间。目录本身的修改时间不参与比较。
+    """
+    old = _Cursor(old_records, "旧快照")
+    new = _Cursor(new_records, "新快照")
+    while old.current is not None or new.current is not None:
+        o, n = old.current, new.current
+        if n is None or (o is not None and o.parts < n.parts):
+            yield REMOVED, o, None
+            old.step()
+        elif o is None or n.parts < o.parts:
+            yield ADDED, None, n
+            new.step()
+        elif o.is_dir != n.is_dir:
+            yield REMOVED, o, None
+            yield ADDED, None, n
+            old.step()
+            new.step()
+        else:
+            if not o.is_dir and _is_modified(o, n, compare_hash, hash_algo):
+                yield MODIFIED, o, n
+            old.advance()
+            new.advance()
+
+
+def open_source(path, ignore_hidden=True, hash_algo=None):
+    """把目录或快照文件统一为 (名称, 条目流, 快照使用的校验算法)"""
+    if os.path.isdir(path):
+        root = os.path.abspath(path)
+        return os.path.basename(root), iter_records(root, ignore_hidden, hash_algo), hash_algo
+    snapshot = Snapshot(path)
+    return os.path.basename(snapshot.root.rstrip("/\\")), snapshot, snapshot.hash_algo
+
+
+def _describe(status, old, new):
+    if status != MODIFIED:
+        return ""
+    if old.size != new.size:
+        return (f" ({format_size(old.size)} → "
+                f"{format_size(new.size)})")
+    return ""
+
+
+def iter_diff_lines(root_name, changes):
+    """以目录树形式渲染差异，只显示有变化的条目及其上级目录"""
+    # 节点: [子节点字典, 状态, 是否目录, 说明]
+    tree = [{}, None, True, ""]
+    counts = {ADDED: 0, REMOVED: 0, MODIFIED: 0}
+    for status, old, new in changes:
+        record = new if new is not None else old
+        counts[status] += 1
+        node = tree
+        for name in record.parts[:-1]:
+            node = node[0].setdefault(name, [{}, None, True, ""])
+        leaf = node[0].get(record.parts[-1])
+        # 类型变化时同一名称会先后出现“删除”和“新增”，合并为一次修改
+        if leaf is not None and leaf[1] == REMOVED and status == ADDED:
+            leaf[1:] = [MODIFIED, record.is_dir, " (类型改变)"]
+            counts[REMOVED] -= 1
+            counts[ADDED] -= 1
+            counts[MODIFIED] += 1
+        elif leaf is not None:
+            leaf[1:] = [status, record.is_dir, _describe(status, old, new)]
+        else:
+            node[0][record.parts[-1]] = [{}, status, record.is_dir, _describe(status, old, new)]
+
+    yield f"{root_name}/"
+    stack = [(iter(tree[0].items()), len(tree[0]), 0, "")]
+    while stack:
+        items, total, index, prefix = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+        stack[-1] = (items, total, index + 1, prefix)
+        name, (children, status, is_dir, note) = item
+        is_last = index == total - 1
+        marker = MARKERS[status] + " " if status else ""
+        yield f"{prefix}{'└── ' if is_last else '├── '}{marker}{name}{'/' if is_dir else ''}{note}"
+        if children:
+            stack.append((iter(children.items()), len(children),
+                          0, prefix + ("    " if is_last else "│   ")))
+
+    yield ""
+    yield f"新增 {counts[ADDED]}, 删除 {counts[REMOVED]}, 修改 {counts[MODIFIED]}"
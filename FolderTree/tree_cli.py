@@ -0,0 +1,218 @@
+"""目录树生成器命令行版本（不加载 Qt，适合在 cron / CI 中调用）
+
+示例:
+    python tree_cli.py /srv/data --size --collapse node_modules --collapse '*/.cache'
+    python tree_cli.py /srv/data --expand docs --expand src/core -L 3 --format json
+    python tree_cli.py /srv/data --snapshot data-0601.ndjson.gz
+    python tree_cli.py data-0601.ndjson.gz --diff /srv/data
+    python tree_cli.py dist --hash sha256 --manifest SHA256SUMS
+"""
+import argparse
+import os
+import sys
+from fnmatch import fnmatchcase
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，用于导入 common
+from common import instrument
+import tree_engine
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="生成目录树并输出到标准输出")
+    parser.add_argument("path", help="目标目录")
+    parser.add_argument("-a", "--hidden", action="store_true",
+                        help="包含隐藏文件/文件夹（默认忽略）")
+    parser.add_argument("-d", "--dirs-only", action="store_true",
+                        help="只显示文件夹，不包含文件")
+    parser.add_argument("-s", "--size", action="store_true",
+                        help="显示文件大小")
+    parser.add_argument("-e", "--expand", action="append", metavar="RULE", default=[],
+                        help="只展开匹配的文件夹（相对路径或通配符，可重复）；"
+                             "指定的路径会连同其上级文件夹一起展开")
+    parser.add_argument("-c", "--collapse", action="append", metavar="RULE", default=[],
+                        help="不展开匹配的文件夹（相对路径或通配符，可重复）")
+    parser.add_argument("-L", "--max-depth", type=int, metavar="N",
+                        help="最多展开 N 层")
+    parser.add_argument("-D", "--duplicates", action="store_true",
+                        help="查找重复文件，在目录树中标注并在末尾列出重复组")
+    parser.add_argument("-j", "--workers", type=int, metavar="N",
+                        help="计算哈希/校验值使用的线程数（默认 2）")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="把目录快照保存到 FILE（.gz 结尾时压缩），不输出目录树")
+    parser.add_argument("--diff", metavar="NEW",
+                        help="比较 path 与 NEW（目录或快照文件），输出新增/删除/修改的条目")
+    parser.add_argument("--hash", metavar="ALGO",
+                        help="计算文件校验值使用的算法（如 sha256），用于快照和 --by-hash；"
+                             "生成目录树时在每个文件后附加校验值")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="生成目录树的同时把校验清单写入 FILE（sha256sum -c 可直接检查，"
+                             "未指定 --hash 时使用 sha256）")
+    parser.add_argument("--by-hash", action="store_true",
+                        help="比较差异时按文件内容校验值判断是否修改，而不只看修改时间")
+    parser.add_argument("-f", "--format", choices=["text", "json"], default="text",
+                        help="输出格式（默认 text）")
+    instrument.add_arguments(parser)
+    return parser
+
+
+def _matches(rel_path, rules):
+    return any(fnmatchcase(rel_path, rule) for rule in rules)
+
+
+def make_expand_rule(root, expand_rules, collapse_rules):
+    """把命令行的展开/折叠规则转换为 iter_entries 使用的判断函数"""
+    if not expand_rules and not collapse_rules:
+        return None
+
+    expand_rules = [rule.strip("/") for rule in expand_rules]
+    collapse_rules = [rule.strip("/") for rule in collapse_rules]
+    # 规则指向的文件夹的所有上级目录也需要展开，否则永远到达不了目标；
+    # 规则中间可能有通配符（如 src/*/core），所以逐级与规则的前几段比较
+    rule_parts = [rule.split("/") for rule in expand_rules]
+
+    def is_ancestor(rel_parts):
+        return any(len(rel_parts) < len(parts)
+                   and all(fnmatchcase(name, pattern) for name, pattern in zip(rel_parts, parts))
+                   for parts in rule_parts)
+
+    def expand(path):
+        rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+        if _matches(rel_path, collapse_rules):
+            return False
+        if not expand_rules:
+            return True
+        return _matches(rel_path, expand_rules) or is_ancestor(rel_path.split("/"))
+
+    return expand
+
+
+def write_lines(out, lines):
+    """逐行写出文本；下游（例如 head）提前关闭管道时安静退出"""
+    try:
+        for line in lines:
+            out.write(line)
+            out.write("\n")
+        out.flush()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, out.fileno())
+
+
+def run_diff(args):
+    """--diff 模式：比较两个目录/快照"""
+    import snapshot
+
+    for path in (args.path, args.diff):
+        if not os.path.isdir(path) and not snapshot.is_snapshot_file(path):
+            print(f"错误: 既不是目录也不是快照文件: {path}", file=sys.stderr)
+            return 2
+
+    ignore_hidden = not args.hidden
+    old_name, old_records, old_algo = snapshot.open_source(args.path, ignore_hidden)
+    new_name, new_records, new_algo = snapshot.open_source(args.diff, ignore_hidden)
+    if args.by_hash and None not in (old_algo, new_algo) and old_algo != new_algo:
+        print(f"错误: 两个快照的校验算法不同 ({old_algo} / {new_algo})", file=sys.stderr)
+        return 2
+    # 快照里记录的校验值只能和同一算法算出的值比较，目录一侧也必须用它
+    recorded_algo = old_algo or new_algo
+    if recorded_algo and args.hash and args.hash != recorded_algo:
+        print(f"错误: --hash {args.hash} 与快照记录的校验算法 {recorded_algo} 不同", file=sys.stderr)
+        return 2
+    hash_algo = recorded_algo or args.hash or snapshot.DEFAULT_HASH
+
+    changes = snapshot.diff_records(old_records, new_records, args.by_hash, hash_algo)
+    if args.format == "json":
+        import json
+
+        def rows():
+            for status, old, new in changes:
+                record = new if new is not None else old
+                yield json.dumps({
+                    "status": status,
+                    "path": "/".join(record.parts),
+                    "type": "dir" if record.is_dir else "file",
+                    "old_size": None if old is None else old.size,
+                    "new_size": None if new is None else new.size,
+                }, ensure_ascii=False)
+
+        write_lines(sys.stdout, rows())
+    else:
+        name = old_name if old_name == new_name else f"{old_name} → {new_name}"
+        write_lines(sys.stdout, snapshot.iter_diff_lines(name, changes))
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    instrument.configure_from_args(args)
+    if args.duplicates and args.dirs_only:
+        parser.error("--duplicates 需要包含文件，不能与 --dirs-only 同时使用")
+    if args.manifest and (args.dirs_only or args.duplicates or args.snapshot or args.diff):
+        parser.error("--manifest 不能与 --dirs-only / --duplicates / --snapshot / --diff 同时使用")
+    if args.duplicates and args.hash and not (args.snapshot or args.diff):
+        # 与图形界面一致：重复文件标注和校验值列不能同时输出
+        parser.error("--duplicates 不能与 --hash 同时使用")
+    if args.hash:
+        import checksums
+        try:
+            checksums.check_algorithm(args.hash)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.diff:
+        return run_diff(args)
+
+    root = os.path.abspath(args.path)
+    if not os.path.isdir(root):
+        print(f"错误: 指定的路径不是一个有效的目录: {args.path}", file=sys.stderr)
+        return 2
+
+    if args.snapshot:
+        import snapshot
+        count = snapshot.save_snapshot(root, args.snapshot, not args.hidden, args.hash)
+        print(f"已保存 {count} 个条目到 {args.snapshot}", file=sys.stderr)
+        return 0
+
+    options = dict(
+        ignore_hidden=not args.hidden,
+        show_files=not args.dirs_only,
+        show_size=args.size,
+        expand=make_expand_rule(root, args.expand, args.collapse),
+        max_depth=args.max_depth,
+    )
+
+    manifest = None
+    if args.duplicates:
+        import duplicates
+        del options["show_files"]
+        options["workers"] = args.workers
+        build_dict = duplicates.build_duplicate_tree_dict
+        iter_lines = duplicates.iter_duplicate_tree_lines
+    else:
+        build_dict = tree_engine.build_tree_dict
+        iter_lines = tree_engine.iter_tree_lines
+        if args.hash or args.manifest:
+            import checksums
+            options["hash_algo"] = args.hash or checksums.DEFAULT_HASH
+            options["workers"] = args.workers
+        if args.manifest:
+            # 与 sha256sum 一致：UTF-8、\n 换行
+            manifest = open(args.manifest, "w", encoding="utf-8", newline="\n")
+            options["manifest"] = manifest
+
+    try:
+        with instrument.span("tree.cli", format=args.format, duplicates=args.duplicates,
+                             hash=options.get("hash_algo")):
+            if args.format == "json":
+                import json
+                write_lines(sys.stdout, [json.dumps(build_dict(root, **options), ensure_ascii=False)])
+            else:
+                write_lines(sys.stdout, iter_lines(root, **options))
+    finally:
+        if manifest is not None:
+            manifest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
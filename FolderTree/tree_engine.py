@@ -0,0 +1,214 @@
+"""目录树遍历与渲染引擎（不依赖 Qt，可供图形界面与命令行共用）"""
+import os
+
+from common import instrument
+from common.formatting import format_size
+
+PERMISSION_DENIED = "[权限被拒绝]"
+SIZE_UNAVAILABLE = "无法获取大小"
+
+
+class TreeEntry:
+    """目录树中的一个条目（对应输出中的一行）"""
+    __slots__ = ("name", "path", "prefix", "connector", "depth",
+                 "is_dir", "expanded", "size", "error", "digest")
+
+    def __init__(self, name, path, prefix, connector, depth,
+                 is_dir=False, expanded=False, size=None, error=None):
+        self.name = name
+        self.path = path
+        self.prefix = prefix
+        self.connector = connector
+        self.depth = depth
+        self.is_dir = is_dir
+        self.expanded = expanded
+        self.size = size
+        self.error = error
+        self.digest = None  # 文件校验值，只在要求计算时填入（见 checksums）
+
+
+def _is_dir(dir_entry):
+    try:
+        return dir_entry.is_dir()
+    except OSError:
+        return False
+
+
+def _is_symlink(dir_entry):
+    try:
+        return dir_entry.is_symlink()
+    except OSError:
+        return False
+
+
+def _file_size(dir_entry):
+    try:
+        return dir_entry.stat().st_size
+    except OSError:
+        return None
+
+
+def _iter_children(path, prefix, depth, options):
+    """列出一个目录的直接子项，按“先目录后文件”的顺序产出条目"""
+    ignore_hidden, show_files, expand, max_depth, with_size = options
+    try:
+        with os.scandir(path) as it:
+            items = sorted(it, key=lambda e: e.name)
+    except PermissionError:
+        yield TreeEntry(None, path, prefix, "  ", depth, error=PERMISSION_DENIED)
+        return
+    instrument.count("tree.scandir")
+    instrument.count("tree.entries", len(items))
+
+    dirs = []
+    files = []
+    for item in items:
+        if ignore_hidden and item.name.startswith('.'):
+            continue
+        if _is_dir(item):
+            dirs.append(item)
+        elif show_files:
+            files.append(item)
+
+    can_expand = max_depth is None or depth < max_depth
+    for i, item in enumerate(dirs):
+        full_path = os.path.join(path, item.name)
+        is_last = i == len(dirs) - 1 and not files
+        # 指向目录的符号链接只列出、不展开（与 os.walk 一致），避免链接成环时无限展开
+        yield TreeEntry(
+            item.name, full_path, prefix, "└── " if is_last else "├── ", depth,
+            is_dir=True,
+            expanded=can_expand and not _is_symlink(item) and (expand is None or expand(full_path)),
+        )
+
+    for i, item in enumerate(files):
+        is_last = i == len(files) - 1 and (i > 0 or len(dirs) > 0)
+        yield TreeEntry(
+            item.name, os.path.join(path, item.name), prefix,
+            "└── " if is_last else "├── ", depth,
+            size=_file_size(item) if with_size else None,
+        )
+
+
+def iter_entries(root, ignore_hidden=True, show_files=True, expand=None,
+                 max_depth=None, with_size=False):
+    """按输出顺序遍历目录树，逐个产出 TreeEntry（不包含根目录本身）
+
+    expand 为 None 时展开所有子目录，否则为接收完整路径、返回是否展开的函数；
+    max_depth 限制展开层级（根目录的直接子项为第 1 层）。
+    使用显式栈而非递归，极深的目录也不会触发递归上限。
+    """
+    options = (ignore_hidden, show_files, expand, max_depth, with_size)
+    stack = [_iter_children(root, "", 1, options)]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+        yield entry
+        if entry.expanded:
+            child_prefix = entry.prefix + ("    " if entry.connector == "└── " else "│   ")
+            stack.append(_iter_children(entry.path, child_prefix, entry.depth + 1, options))
+
+
+def format_entry(entry, show_size=False):
+    """把单个条目渲染为一行文本（不含换行符）"""
+    if entry.error:
+        return f"{entry.prefix}{entry.connector}{entry.error}"
+    if entry.is_dir:
+        return f"{entry.prefix}{entry.connector}{entry.name}/"
+    line = f"{entry.prefix}{entry.connector}{entry.name}"
+    if show_size:
+        if entry.size is None:
+            line += f" ({SIZE_UNAVAILABLE})"
+        else:
+            line += f" ({format_size(entry.size)})"
+    return line
+
+
+def render_lines(root, entries, show_size=False, annotate=None):
+    """把条目序列渲染为文本行；annotate(entry) 可返回附加在行尾的标注"""
+    yield f"{os.path.basename(root)}/"
+    for entry in entries:
+        line = format_entry(entry, show_size)
+        if annotate is not None:
+            line += annotate(entry) or ""
+        yield line
+
+
+def _with_digests(root, entries, hash_algo, workers, manifest):
+    """在遍历的同时并行计算文件校验值，需要时把校验清单写入 manifest"""
+    import checksums
+    entries = checksums.iter_hashed_entries(entries, hash_algo, workers)
+    if manifest is not None:
+        entries = checksums.tee_manifest(entries, root, manifest)
+    return entries
+
+
+def iter_tree_lines(root, ignore_hidden=True, show_files=True, show_size=False,
+                    expand=None, max_depth=None, hash_algo=None, workers=None, manifest=None):
+    """逐行产出目录树文本，边遍历边输出
+
+    hash_algo 不为空时在每个文件行尾附加校验值（用 workers 个线程计算），
+    manifest 为文本文件对象时同时写出 sha256sum 格式的校验清单。
+    """
+    if ignore_hidden and os.path.basename(root).startswith('.'):
+        return
+    show_size = show_files and show_size
+    entries = iter_entries(root, ignore_hidden, show_files, expand, max_depth, show_size)
+    if hash_algo and show_files:
+        import checksums
+        entries = _with_digests(root, entries, hash_algo, workers, manifest)
+        yield from render_lines(root, entries, show_size, checksums.format_digest)
+    else:
+        yield from render_lines(root, entries, show_size)
+
+
+def build_tree_text(root, ignore_hidden=True, show_files=True, show_size=False,
+                    expand=None, max_depth=None, hash_algo=None, workers=None, manifest=None):
+    """生成完整的目录树文本"""
+    return "".join(
+        line + "\n"
+        for line in iter_tree_lines(root, ignore_hidden, show_files, show_size, expand, max_depth,
+                                    hash_algo, workers, manifest)
+    )
+
+
+def tree_to_dict(root, entries, show_size=False, extra=None):
+    """把条目序列转换为嵌套字典；extra(entry) 可返回需要合并到节点中的字段"""
+    tree = {"name": os.path.basename(root), "type": "dir", "children": []}
+    # stack[d] 为第 d 层条目所属的 children 列表
+    stack = [None, tree["children"]]
+    for entry in entries:
+        del stack[entry.depth + 1:]
+        siblings = stack[entry.depth]
+        if entry.error:
+            siblings.append({"error": "permission denied"})
+            continue
+        if entry.is_dir:
+            node = {"name": entry.name, "type": "dir"}
+            if entry.expanded:
+                node["children"] = []
+            stack.append(node.get("children"))
+        else:
+            node = {"name": entry.name, "type": "file"}
+            if show_size:
+                node["size"] = entry.size
+        if extra is not None:
+            node.update(extra(entry) or ())
+        siblings.append(node)
+    return tree
+
+
+def build_tree_dict(root, ignore_hidden=True, show_files=True, show_size=False,
+                    expand=None, max_depth=None, hash_algo=None, workers=None, manifest=None):
+    """生成嵌套字典形式的目录树，便于序列化为 JSON（hash_algo 等参数同 iter_tree_lines）"""
+    if ignore_hidden and os.path.basename(root).startswith('.'):
+        return None
+    show_size = show_files and show_size
+    entries = iter_entries(root, ignore_hidden, show_files, expand, max_depth, show_size)
+    if hash_algo and show_files:
+        entries = _with_digests(root, entries, hash_algo, workers, manifest)
+        return tree_to_dict(root, entries, show_size,
+                            lambda e: None if e.is_dir else {"digest": e.digest})
+    return tree_to_dict(root, entries, show_size)
@@ -0,0 +1 @@
+"""各工具共用的模块（性能记录等），入口脚本会把仓库根目录加入 sys.path 以便导入"""
@@ -0,0 +1,10 @@
+"""各工具共用的显示格式化函数"""
+
+
+def format_size(size):
+    """格式化文件大小（可为负数，用于显示差值）"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
@@ -0,0 +1,237 @@
+"""计时区间、计数器和可选的 cProfile 采样，供各工具共用
+
+默认关闭，关闭时 span() / count() 几乎没有开销。开启方式：
+    环境变量  TOOLS_TRACE=trace.json    TOOLS_PROFILE=profile.pstats
+    命令行    --trace trace.json         --profile profile.pstats
+trace.json 为 Chrome 追踪事件格式，可直接拖入 chrome://tracing 或 https://ui.perfetto.dev 查看；
+计数器的最终值写在其中的 otherData.counters。
+profile.pstats 可用 python -m pstats 或 snakeviz 查看（只采样开启它的线程，通常是主线程）。
+数据在进程退出时写出，也可以手动调用 flush()。multiprocessing 子进程不记录：
+spawn 启动的子进程不会读取环境变量，fork 出的子进程需要在进程池的 initializer 中调用 disable()。
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = "TOOLS_TRACE"
+PROFILE_ENV = "TOOLS_PROFILE"
+
+# 事件数上限，超过后只累计计数器，不再记录区间
+MAX_EVENTS = 1_000_000
+
+_lock = threading.Lock()
+_enabled = False
+_trace_path = None
+_profile_path = None
+_profiler = None
+_events = []
+_dropped = 0
+_counters = {}
+_atexit_registered = False
+
+
+class _NullSpan:
+    """关闭时使用的空区间"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if self.args:
+            event["args"] = self.args
+        if exc_type is not None:
+            event.setdefault("args", {})["error"] = exc_type.__name__
+        _record(event)
+        return False
+
+
+def _record(event):
+    global _dropped
+    with _lock:
+        if len(_events) < MAX_EVENTS:
+            _events.append(event)
+        else:
+            _dropped += 1
+
+
+def enabled():
+    return _enabled
+
+
+def span(name, **args):
+    """计时区间，用作上下文管理器：with span("apk.parse", path=p): ...
+
+    args 会写入追踪事件，只应放少量可序列化的值。
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name):
+    """把整个函数调用记为一个区间的装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """累加计数器（读取字节数、访问的条目数等）"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def counters():
+    """当前计数器值的副本"""
+    with _lock:
+        return dict(_counters)
+
+
+def configure(trace=None, profile=None):
+    """开启记录；trace / profile 为输出文件路径，均为空时不做任何事"""
+    global _enabled, _trace_path, _profile_path, _profiler, _atexit_registered
+    if not trace and not profile:
+        return
+    if trace:
+        _trace_path = os.path.abspath(trace)
+    if profile and _profiler is None:
+        import cProfile
+        _profile_path = os.path.abspath(profile)
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    _enabled = True
+    if not _atexit_registered:
+        atexit.register(flush)
+        _atexit_registered = True
+
+
+def disable():
+    """关闭记录并丢弃已记录的数据，不写出任何文件（用作进程池的 initializer）"""
+    global _enabled, _trace_path, _profile_path, _profiler, _dropped
+    if _profiler is not None:
+        _profiler.disable()
+    with _lock:
+        _enabled = False
+        _trace_path = None
+        _profile_path = None
+        _profiler = None
+        _events.clear()
+        _counters.clear()
+        _dropped = 0
+
+
+def configure_from_env():
+    """按 TOOLS_TRACE / TOOLS_PROFILE 环境变量开启记录"""
+    trace_path = os.environ.get(TRACE_ENV) or None
+    profile_path = os.environ.get(PROFILE_ENV) or None
+    if not trace_path and not profile_path:
+        return
+    import multiprocessing
+    if multiprocessing.parent_process() is not None:
+        return  # 进程池子进程共享同样的环境变量，不能写同一个文件
+    configure(trace_path, profile_path)
+
+
+def add_arguments(parser):
+    """给 argparse 命令行加上 --trace / --profile 选项"""
+    parser.add_argument("--trace", metavar="FILE", help="把计时区间和计数器写入 Chrome 追踪格式的 JSON 文件")
+    parser.add_argument("--profile", metavar="FILE", help="用 cProfile 采样并写入 pstats 文件")
+
+
+def configure_from_args(args):
+    """按 add_arguments 添加的选项开启记录，未指定时再看环境变量"""
+    if args.trace or args.profile:
+        configure(args.trace, args.profile)
+    else:
+        configure_from_env()
+
+
+def setup_from_argv(argv):
+    """图形界面入口使用：从 argv 中取出并移除 --trace / --profile 选项，再按它们或环境变量开启记录"""
+    options = {"--trace": None, "--profile": None}
+    rest = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        key, sep, value = arg.partition("=")
+        if key in options and sep:
+            options[key] = value
+        elif arg in options and i + 1 < len(argv):
+            options[arg] = argv[i + 1]
+            i += 1
+        else:
+            rest.append(arg)
+        i += 1
+    argv[:] = rest
+    if options["--trace"] or options["--profile"]:
+        configure(options["--trace"], options["--profile"])
+    else:
+        configure_from_env()
+
+
+def flush():
+    """写出追踪文件和 pstats 文件"""
+    if _profiler is not None and _profile_path:
+        _profiler.disable()
+        _profiler.dump_stats(_profile_path)
+        _profiler.enable()
+    if not _trace_path:
+        return
+    with _lock:
+        events = list(_events)
+        data = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"counters": dict(_counters), "dropped_events": _dropped},
+        }
+    pid = os.getpid()
+    events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                   "args": {"name": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"}})
+    if data["otherData"]["counters"]:
+        ts = max((e["ts"] + e.get("dur", 0) for e in events if "ts" in e), default=0)
+        events.append({"name": "counters", "ph": "C", "ts": ts, "pid": pid, "tid": 0,
+                       "args": data["otherData"]["counters"]})
+    tmp_path = _trace_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, _trace_path)
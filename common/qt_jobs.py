@@ -0,0 +1,68 @@
+"""把 scheduler 的任务接到 Qt 信号上
+
+任务在调度器的工作线程中运行，QtJob 在界面线程中创建，
+它的信号从工作线程发出后由 Qt 排队送回界面线程，槽函数里可以直接操作控件。
+
+    job = QtJob(fn, path, parent=self)
+    job.reported.connect(...)
+    job.succeeded.connect(...)
+    job.start()   # 先连接信号再启动，避免任务很快结束时信号无人接收
+"""
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from common.scheduler import IO, NORMAL, Cancelled, get_scheduler
+
+# 运行中的任务，保持引用直到结束，避免没有父对象的 QtJob 被提前回收
+_running = set()
+
+
+class QtJob(QObject):
+    reported = pyqtSignal(tuple)    # ctx.report(...) 的参数
+    succeeded = pyqtSignal(object)  # 任务函数的返回值
+    failed = pyqtSignal(str)        # 出错信息
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()         # 以上三种结束方式之后都会发出
+
+    def __init__(self, fn, *args, parent=None, lane=IO, priority=NORMAL, name=None, **kwargs):
+        """fn(ctx, *args, **kwargs) 在工作线程中运行，ctx 见 scheduler.JobContext"""
+        super().__init__(parent)
+        self._call = (fn, args, kwargs)
+        self._options = {"lane": lane, "priority": priority, "name": name}
+        self.job = None
+
+    def start(self):
+        fn, args, kwargs = self._call
+        _running.add(self)
+        self.job = get_scheduler().submit(fn, *args, on_report=self._on_report,
+                                          **self._options, **kwargs)
+        self.job.add_done_callback(self._on_done)
+        return self
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def _on_report(self, *payload):
+        try:
+            self.reported.emit(payload)
+        except RuntimeError:
+            pass  # 父控件已销毁
+
+    def _on_done(self, job):
+        try:
+            try:
+                result = job.future.result()
+            except Cancelled:
+                self.cancelled.emit()
+            except Exception as e:
+                self.failed.emit(str(e) or type(e).__name__)
+            else:
+                if job.cancelled:
+                    self.cancelled.emit()
+                else:
+                    self.succeeded.emit(result)
+            self.finished.emit()
+        except RuntimeError:
+            pass  # 父控件已销毁
+        finally:
+            _running.discard(self)
@@ -0,0 +1,205 @@
+"""可取消、带优先级的后台任务调度器，供各工具共用（不依赖 Qt，Qt 界面通过 qt_jobs 使用）
+
+任务按通道 (lane) 分开排队：
+    io   读取磁盘的任务（计算校验值、遍历目录、解析 APK），默认 2 个线程，避免多个任务同时抢磁盘
+    cpu  计算任务（例如驱动批量分析的进程池），线程数与 CPU 核数相同
+同一通道内优先级高的先执行，同优先级按提交顺序执行。所有工具共用 get_scheduler() 返回的同一个实例，
+在启动器中同时运行多个工具时并发数也不会叠加。
+
+任务函数的第一个参数是 JobContext：通过 ctx.token 检查取消，通过 ctx.report(...) 上报进度或中间结果。
+取消是协作式的：尚未开始的任务直接丢弃，正在运行的任务需要自己检查 ctx.token。
+"""
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import Future
+
+from common import instrument
+
+IO = "io"
+CPU = "cpu"
+
+DEFAULT_LANES = {
+    IO: 2,
+    CPU: os.cpu_count() or 1,
+}
+
+# 优先级，数值越大越先执行
+NORMAL = 0
+HIGH = 10
+
+
+class Cancelled(Exception):
+    """任务被取消"""
+
+
+class CancelToken:
+    """取消标记，可在多个任务之间共享"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class JobContext:
+    """传给任务函数的上下文"""
+    __slots__ = ("job", "token")
+
+    def __init__(self, job):
+        self.job = job
+        self.token = job.token
+
+    def report(self, *payload):
+        """上报进度或中间结果，转发给提交时的 on_report 回调（在工作线程中调用）"""
+        if self.job.on_report is not None and not self.token.cancelled:
+            self.job.on_report(*payload)
+
+
+class Job:
+    """一个已提交的任务；future 在任务结束后给出返回值或异常，被取消时抛出 Cancelled"""
+
+    def __init__(self, fn, args, kwargs, lane, priority, token, on_report, name):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.lane = lane
+        self.priority = priority
+        self.token = token or CancelToken()
+        self.on_report = on_report
+        self.name = name or getattr(fn, "__name__", "job")
+        self.future = Future()
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def add_done_callback(self, callback):
+        """callback(job) 在任务结束（包括取消、出错）后调用，可能在工作线程中执行"""
+        self.future.add_done_callback(lambda _: callback(self))
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class _Lane:
+    def __init__(self, name, workers):
+        self.name = name
+        self.max_workers = workers
+        self.queue = []
+        self.threads = []
+        self.idle = 0
+
+
+class Scheduler:
+    def __init__(self, lanes=None):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._lanes = {name: _Lane(name, workers)
+                       for name, workers in (lanes or DEFAULT_LANES).items()}
+        self._seq = itertools.count()
+        self._shutdown = False
+
+    def submit(self, fn, *args, lane=IO, priority=NORMAL, token=None, on_report=None,
+               name=None, **kwargs):
+        """提交任务 fn(ctx, *args, **kwargs)，返回 Job"""
+        job = Job(fn, args, kwargs, lane, priority, token, on_report, name)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("调度器已关闭")
+            state = self._lanes[lane]
+            heapq.heappush(state.queue, (-priority, next(self._seq), job))
+            if state.idle:
+                self._wakeup.notify_all()
+            elif len(state.threads) < state.max_workers:
+                thread = threading.Thread(target=self._worker, args=(state,),
+                                          name=f"scheduler-{lane}-{len(state.threads)}", daemon=True)
+                state.threads.append(thread)
+                thread.start()
+        return job
+
+    def _next_job(self, state):
+        while True:
+            job = None
+            dropped = []
+            with self._lock:
+                while state.queue:
+                    _, _, candidate = heapq.heappop(state.queue)
+                    if candidate.cancelled:
+                        dropped.append(candidate)
+                    else:
+                        job = candidate
+                        break
+                if job is None and not dropped:
+                    if self._shutdown:
+                        return None
+                    state.idle += 1
+                    self._wakeup.wait()
+                    state.idle -= 1
+                    continue
+            # 完成回调可能再次提交任务，必须在锁外设置结果
+            for candidate in dropped:
+                candidate.future.set_exception(Cancelled())
+            if job is not None:
+                return job
+
+    def _worker(self, state):
+        while True:
+            job = self._next_job(state)
+            if job is None:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                with instrument.span("job." + job.name, lane=state.name):
+                    job.token.raise_if_cancelled()
+                    result = job.fn(JobContext(job), *job.args, **job.kwargs)
+                    job.token.raise_if_cancelled()
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+
+    def shutdown(self, wait=True, cancel_pending=True):
+        """停止接受新任务；cancel_pending 为真时丢弃排队中的任务"""
+        dropped = []
+        with self._lock:
+            self._shutdown = True
+            if cancel_pending:
+                for state in self._lanes.values():
+                    dropped.extend(job for _, _, job in state.queue)
+                    state.queue.clear()
+            self._wakeup.notify_all()
+            threads = [t for state in self._lanes.values() for t in state.threads]
+        for job in dropped:
+            job.cancel()
+            job.future.set_exception(Cancelled())
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """进程内共用的调度器"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Scheduler()
+        return _default
@@ -0,0 +1,134 @@
+"""工具集启动器：在同一个 QApplication（PyQt6）中切换使用各个工具
+
+各工具的模块只在第一次切换到该工具时才导入，启动时只加载 Qt 本身；
+工具目录会加入 sys.path，工具内部的同级模块（tree_engine、apk_session 等）照常导入。
+
+用法: python launcher.py [FolderTree|CRCVerify|APKDetailer]
+"""
+import importlib.util
+import multiprocessing
+import os
+import sys
+
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QHBoxLayout, QListWidget, QListWidgetItem,
+    QStackedWidget, QLabel, QMessageBox
+)
+from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QIcon
+
+from common import instrument
+
+# (目录, 显示名称, 主窗口类名)
+TOOLS = [
+    ("FolderTree", "目录树生成器", "DirectoryTreeGenerator"),
+    ("CRCVerify", "文件校验值比较工具", "FileChecksumTool"),
+    ("APKDetailer", "APK 信息解析工具", "APKInfoTool"),
+]
+
+
+def base_path():
+    """工具目录所在位置，兼容打包后的路径"""
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def load_tool_module(tool_dir):
+    """导入工具的 main.py；各工具都叫 main.py，因此以 <目录>_main 的名字注册，互不覆盖"""
+    module_name = f"{tool_dir}_main"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    directory = os.path.join(base_path(), tool_dir)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+class Launcher(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("实用工具集")
+        self.setMinimumSize(QSize(1100, 700))
+        self.tools = {}  # 目录 -> 已创建的工具窗口
+        self.init_ui()
+
+    def init_ui(self):
+        main_widget = QWidget()
+        layout = QHBoxLayout(main_widget)
+
+        self.tool_list = QListWidget()
+        self.tool_list.setIconSize(QSize(24, 24))
+        self.tool_list.setFixedWidth(200)
+        for tool_dir, title, _ in TOOLS:
+            item = QListWidgetItem(QIcon(os.path.join(base_path(), tool_dir, "icon.ico")), title)
+            item.setData(Qt.ItemDataRole.UserRole, tool_dir)
+            self.tool_list.addItem(item)
+        self.tool_list.currentRowChanged.connect(self.switch_tool)
+
+        self.stack = QStackedWidget()
+        placeholder = QLabel("请在左侧选择一个工具")
+        placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        placeholder.setStyleSheet("color: #7f8c8d; font-size: 14px;")
+        self.stack.addWidget(placeholder)
+
+        layout.addWidget(self.tool_list)
+        layout.addWidget(self.stack, 1)
+        self.setCentralWidget(main_widget)
+
+    def open_tool(self, tool_dir):
+        """按目录名切换到某个工具"""
+        for row, (name, _, _) in enumerate(TOOLS):
+            if name.lower() == tool_dir.lower():
+                self.tool_list.setCurrentRow(row)
+                return True
+        return False
+
+    def switch_tool(self, row):
+        if row < 0:
+            return
+        tool_dir, title, class_name = TOOLS[row]
+        widget = self.tools.get(tool_dir)
+        if widget is None:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            try:
+                module = load_tool_module(tool_dir)
+                widget = getattr(module, class_name)()
+            except Exception as e:
+                QMessageBox.critical(self, "错误", f"加载 {title} 失败:\n{str(e)}")
+                return
+            finally:
+                QApplication.restoreOverrideCursor()
+            # 工具本身是 QMainWindow，作为普通控件嵌入右侧
+            widget.setWindowFlags(Qt.WindowType.Widget)
+            self.tools[tool_dir] = widget
+            self.stack.addWidget(widget)
+        self.stack.setCurrentWidget(widget)
+        self.setWindowTitle(f"实用工具集 - {title}")
+        self.setWindowIcon(widget.windowIcon())
+
+    def closeEvent(self, event):
+        """依次关闭已打开的工具，让它们停止各自的后台线程"""
+        for widget in self.tools.values():
+            widget.close()
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # APKDetailer 的批量分析使用子进程
+    instrument.setup_from_argv(sys.argv)
+    app = QApplication(sys.argv)
+    window = Launcher()
+    if len(sys.argv) > 1 and not window.open_tool(sys.argv[1]):
+        print(f"未知的工具: {sys.argv[1]}（可选: {', '.join(name for name, _, _ in TOOLS)}）",
+              file=sys.stderr)
+    window.show()
+    sys.exit(app.exec())